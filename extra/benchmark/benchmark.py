@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# Copyright (c) 2016 Nuxi (https://nuxi.nl/) and contributors.
+#
+# SPDX-License-Identifier: BSD-2-Clause
+
+# Benchmark of the generator on synthetic specifications of increasing size.
+#
+# Every phase of generate.py is timed separately: reading the ITF tree,
+# parsing the ABI, computing the reverse dependencies, pickling the ABI and
+# running every target. The results are written as JSON, so that runs
+# against different commits can be compared using --compare.
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+sys.path.insert(0, ROOT)
+
+from generator.abi_cache import dump_abi
+from generator.itf import parse_itf
+from generator.markdown_html import markdown_to_html
+from generator.parser import AbiParser
+from generator.targets import select_targets
+
+from synthetic import synthetic_spec
+
+
+# Runs a function a number of times, returning its last result and the
+# shortest time it took to complete.
+def measure(repeat, function):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return result, best
+
+
+def run(size, targets, repeat):
+    text = synthetic_spec(size)
+    lines = text.splitlines(True)
+    phases = {}
+
+    tree, phases['itf'] = measure(repeat,
+                                  lambda: parse_itf(lines, 'synthetic'))
+    abi, phases['parse_abi'] = measure(repeat,
+                                       lambda: AbiParser().parse_abi(tree))
+    _, phases['used_by'] = measure(repeat,
+                                   lambda: AbiParser().compute_used_by(abi))
+    _, phases['pickle'] = measure(repeat, lambda: pickle.loads(dump_abi(abi)))
+
+    for target in targets:
+        output, phases[target.path] = measure(repeat,
+                                              lambda: target.generate(abi))
+        if target.html is not None:
+            _, phases[target.html] = measure(repeat,
+                                             lambda: markdown_to_html(output))
+
+    return {
+        'size': size,
+        'lines': len(lines),
+        'types': len(abi.types),
+        'syscalls': len(abi.syscalls),
+        'phases': phases,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'],
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL,
+                              cwd=ROOT,
+                              check=True).stdout.decode('ASCII').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    old = {}
+    if baseline is not None:
+        for result in baseline['results']:
+            old[result['size']] = result['phases']
+
+    for result in results:
+        sys.stderr.write('size {size}: {lines} lines, {types} types, '
+                         '{syscalls} syscalls\n'.format(**result))
+        for phase, seconds in result['phases'].items():
+            line = '  {:40} {:9.4f}s'.format(phase, seconds)
+            previous = old.get(result['size'], {}).get(phase)
+            if previous:
+                line += '  {:9.4f}s  {:6.2f}x'.format(previous,
+                                                      seconds / previous)
+            sys.stderr.write(line + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the generator on synthetic specifications.')
+    parser.add_argument('--sizes',
+                        default='10,100,300',
+                        help='comma separated list of specification sizes, '
+                        'in groups of declarations (default: %(default)s)')
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=3,
+                        help='number of times to run every phase, reporting '
+                        'the fastest (default: %(default)s)')
+    parser.add_argument('--only',
+                        action='append',
+                        metavar='TARGET',
+                        help='only benchmark the given targets or groups of '
+                        'targets')
+    parser.add_argument('-o',
+                        '--output',
+                        metavar='FILE',
+                        help='file to which to write the results as JSON '
+                        '(default: standard output)')
+    parser.add_argument('--compare',
+                        metavar='FILE',
+                        help='results of an earlier run to compare against')
+    args = parser.parse_args()
+
+    only = None
+    if args.only is not None:
+        only = {v for value in args.only for v in value.split(',') if v}
+    targets = select_targets(only)
+    results = [
+        run(int(size), targets, args.repeat) for size in args.sizes.split(',')
+    ]
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    report = json.dumps(
+        {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'repeat': args.repeat,
+            'results': results,
+        },
+        indent=2) + '\n'
+    if args.output is None:
+        sys.stdout.write(report)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# Copyright (c) 2016 Nuxi (https://nuxi.nl/) and contributors.
+#
+# SPDX-License-Identifier: BSD-2-Clause
+
+# Generator of synthetic ABI specifications, used to benchmark the generator
+# on ABIs that are a lot larger than cloudabi.txt.
+#
+# A specification of a given size contains that many groups of declarations,
+# each consisting of an enum, a flags type, an alias, an opaque type, a
+# struct and a syscall. Every fourth group also contains a function type.
+# Structs embed, point to and document links to declarations of earlier
+# groups, so that the dependency graph is both wide and deep. Generation is
+# deterministic for a given size and seed.
+
+import random
+
+
+class _SpecWriter:
+    def __init__(self):
+        self.lines = []
+
+    def line(self, depth, text):
+        self.lines.append('\t' * depth + text)
+
+    def doc(self, depth, *text):
+        for t in text:
+            self.line(depth, '| ' + t)
+
+    def getvalue(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def _group(out, rng, i):
+    enum = 'kind{}'.format(i)
+    flags = 'flags{}'.format(i)
+    alias = 'size{}'.format(i)
+    opaque = 'handle{}'.format(i)
+    struct = 'object{}'.format(i)
+
+    out.line(0, 'enum uint16 {}'.format(enum))
+    out.doc(1, 'Kind of [{}].'.format(struct))
+    for v in range(8):
+        out.line(1, '{} value{}'.format(v, v))
+        out.doc(2, 'Value {} of [{}].'.format(v, struct))
+    out.line(0, '')
+
+    out.line(0, 'flags uint32 {}'.format(flags))
+    out.doc(1, 'Flags of [{}].'.format(struct))
+    for v in range(8):
+        out.line(1, '0x{:02x} bit{}'.format(1 << v, v))
+        out.doc(2, 'Bit {} of [{}].'.format(v, flags))
+    out.line(0, '')
+
+    out.line(0, 'alias uint64 {}'.format(alias))
+    out.doc(1, 'Size of [{}].'.format(struct))
+    out.line(0, '')
+
+    out.line(0, 'opaque uint32 {}'.format(opaque))
+    out.doc(1, 'Handle to [{}].'.format(struct))
+    out.line(1, '0xffffffff invalid')
+    out.doc(2, 'Invalid [{}].'.format(opaque))
+    out.line(0, '')
+
+    out.line(0, 'struct {}'.format(struct))
+    out.doc(1, 'Object number {}.'.format(i))
+    if i > 0:
+        out.doc(1, '', 'Refers to [object{}.kind].'.format(rng.randrange(i)))
+    out.line(1, '{} kind'.format(enum))
+    out.doc(2, 'The kind of this object.')
+    out.line(1, '{} flags'.format(flags))
+    out.doc(2, 'Flags, such as [{}.bit3].'.format(flags))
+    out.line(1, '{} length'.format(alias))
+    out.doc(2, 'Length of the object.')
+    if i > 0:
+        # Embed a struct of an earlier group by value, keeping the nesting
+        # depth logarithmic in the size of the specification.
+        out.line(1, 'object{} parent'.format(i // 2))
+        out.doc(2, 'Embedded parent object.')
+        out.line(1, 'ptr object{} link'.format(rng.randrange(i)))
+        out.doc(2, 'Pointer to another object.')
+    out.line(1, 'array 4 uint8 reserved')
+    out.doc(2, 'Reserved.')
+    out.line(1, 'variant kind')
+    out.line(2, 'value0 value1')
+    out.line(3, 'struct scalar')
+    out.line(4, 'uint64 number')
+    out.doc(5, 'A numerical value.')
+    out.line(4, '{} owner'.format(opaque))
+    out.doc(5, 'Owner of the value.')
+    out.line(2, 'value2 value3 value4')
+    out.line(3, 'struct buffer')
+    out.line(4, 'crange void data')
+    out.doc(5, 'Buffer attached to the object.')
+    out.line(2, 'value5')
+    out.line(3, 'struct pointer')
+    out.line(4, 'ptr void address')
+    out.doc(5, 'Address of the object.')
+    out.line(0, '')
+
+    if i % 4 == 0:
+        out.line(0, 'function callback{}'.format(i))
+        out.doc(1, 'Callback invoked on [{}].'.format(struct))
+        out.line(1, 'in')
+        out.line(2, 'ptr {} object'.format(struct))
+        out.doc(3, 'The object.')
+        out.line(2, 'ptr void argument')
+        out.doc(3, 'Argument provided by the caller.')
+        out.line(0, '')
+
+    out.line(0, 'syscall call{}'.format(i))
+    out.doc(
+        1,
+        'Operates on [{}]. Returns [errno.inval] on failure.'.format(struct))
+    out.line(1, 'in')
+    out.line(2, '{} handle'.format(opaque))
+    out.doc(3, 'Handle of the object.')
+    out.line(2, 'cptr {} object'.format(struct))
+    out.doc(3, 'The object.')
+    out.line(2, '{} kind'.format(enum))
+    out.doc(3, 'The kind.')
+    if i % 10 == 9:
+        out.line(1, 'noreturn')
+    else:
+        out.line(1, 'out')
+        out.line(2, '{} result'.format(alias))
+        out.doc(3, 'The result.')
+    out.line(0, '')
+
+
+def synthetic_spec(size, seed=0):
+    rng = random.Random(seed)
+    out = _SpecWriter()
+    out.doc(0, '# Synthetic ABI', '',
+            'Benchmark specification of size {}.'.format(size))
+    out.line(0, '')
+    out.line(0, 'enum uint16 errno')
+    out.doc(1, 'Error codes returned by system calls.')
+    for v, name in enumerate(['success', 'inval', 'nomem', 'notsup']):
+        out.line(1, '{} {}'.format(v, name))
+        out.doc(2, 'Error code {}.'.format(v))
+    out.line(0, '')
+    for i in range(size):
+        _group(out, rng, i)
+    return out.getvalue()
+
+
+if __name__ == '__main__':
+    import sys
+    sys.stdout.write(synthetic_spec(int(sys.argv[1])))
@@ -3,202 +3,407 @@
 #
 # SPDX-License-Identifier: BSD-2-Clause
 
-from contextlib import redirect_stdout
-import io
+import argparse
+import contextlib
+import difflib
+import glob
+import importlib
 import os
-import subprocess
-
-from generator.abi import *
-from generator.asm import *
-from generator.c import *
-from generator.markdown import *
-from generator.parser import *
-from generator.rust import *
-from generator.syscalls_master import *
-
-abi = AbiParser().parse_abi_file(
-    os.path.join(os.path.dirname(__file__), 'cloudabi.txt'))
-
-procs = []
-
-
-# Pipes output through clang-format to format the C code.
-def open_and_format(filename):
-    proc = subprocess.Popen([
-        'clang-format', '''-style={
-               BasedOnStyle: Google,
-               AllowShortIfStatementsOnASingleLine: false,
-               AllowShortLoopsOnASingleLine: false,
-               AllowShortFunctionsOnASingleLine: None,
-               DerivePointerBinding: false,
-               PointerAlignment: Right,
-         }'''
-    ],
-                            stdin=subprocess.PIPE,
-                            stdout=open(filename, 'w'))
-    procs.append(proc)
-    return io.TextIOWrapper(proc.stdin, encoding='UTF-8')
-
-
-with open('headers/cloudabi_types_common.h', 'w') as f:
-    with redirect_stdout(f):
-        CSyscalldefsGenerator(
-            naming=CNaming('cloudabi_'),
-            header_guard='CLOUDABI_TYPES_COMMON_H',
-            machine_dep=False,
-            preamble='#if defined(__FreeBSD__) && defined(_KERNEL)\n'
-            '#include <sys/types.h>\n'
-            '#elif defined(__linux__) && defined(__KERNEL__)\n'
-            '#include <linux/types.h>\n'
-            '#else\n'
-            '#include <stddef.h>\n'
-            '#include <stdint.h>\n'
-            '#endif\n'
-            '\n'
-            '// Make this code build with g++.\n'
-            '#if defined(__cplusplus) && defined(__GNUC__) && !defined(__clang__)\n'
-            '#define _Alignas alignas\n'
-            '#define _Alignof alignof\n'
-            '#define _Atomic(x) x\n'
-            '#define _Static_assert static_assert\n'
-            '#endif\n').generate_abi(abi)
-
-with open('headers/cloudabi_types.h', 'w') as f:
-    with redirect_stdout(f):
-        CSyscalldefsGenerator(
-            naming=CNaming('cloudabi_'),
-            header_guard='CLOUDABI_TYPES_H',
-            machine_dep=True,
-            preamble='#include "cloudabi_types_common.h"\n').generate_abi(abi)
-
-with open('headers/cloudabi32_types.h', 'w') as f:
-    with redirect_stdout(f):
-        CSyscalldefsGenerator(
-            naming=CNaming('cloudabi_', 'cloudabi32_'),
-            header_guard='CLOUDABI32_TYPES_H',
-            machine_dep=True,
-            md_type=int_types['uint32'],
-            preamble='#include "cloudabi_types_common.h"\n').generate_abi(abi)
-
-with open('headers/cloudabi64_types.h', 'w') as f:
-    with redirect_stdout(f):
-        CSyscalldefsGenerator(
-            naming=CNaming('cloudabi_', 'cloudabi64_'),
-            header_guard='CLOUDABI64_TYPES_H',
-            machine_dep=True,
-            md_type=int_types['uint64'],
-            preamble='#include "cloudabi_types_common.h"\n').generate_abi(abi)
-
-with open_and_format('headers/cloudabi_syscalls.h') as f:
-    with redirect_stdout(f):
-        CSyscallsGenerator(
-            naming=CNaming('cloudabi_'),
-            header_guard='CLOUDABI_SYSCALLS_H',
-            preamble='#include "cloudabi_types.h"\n').generate_abi(abi)
-
-with open('headers/cloudabi_syscalls_info.h', 'w') as f:
-    with redirect_stdout(f):
-        CSyscallsInfoGenerator(
-            naming=CNaming('cloudabi_'),
-            header_guard='CLOUDABI_SYSCALLS_INFO_H',
-        ).generate_abi(abi)
-
-with open('rust/cloudabi.rs', 'w') as f:
-    with redirect_stdout(f):
-        RustGenerator(naming=RustNaming()).generate_abi(abi)
-
-with open('vdsos/cloudabi_vdso_aarch64.S', 'w') as f:
-    with redirect_stdout(f):
-        AsmVdsoAarch64Generator().generate_abi(abi)
-
-with open('vdsos/cloudabi_vdso_armv6.S', 'w') as f:
-    with redirect_stdout(f):
-        AsmVdsoArmv6Generator().generate_abi(abi)
-
-with open('vdsos/cloudabi_vdso_armv6_on_64bit.S', 'w') as f:
-    with redirect_stdout(f):
-        AsmVdsoArmv6On64bitGenerator().generate_abi(abi)
-
-with open('vdsos/cloudabi_vdso_i686.S', 'w') as f:
-    with redirect_stdout(f):
-        AsmVdsoI686Generator().generate_abi(abi)
-
-with open('vdsos/cloudabi_vdso_i686_on_64bit.S', 'w') as f:
-    with redirect_stdout(f):
-        AsmVdsoI686On64bitGenerator().generate_abi(abi)
-
-with open('vdsos/cloudabi_vdso_x86_64.S', 'w') as f:
-    with redirect_stdout(f):
-        AsmVdsoX86_64Generator().generate_abi(abi)
-
-with open('freebsd/syscalls32.master', 'w') as f:
-    with redirect_stdout(f):
-        SyscallsMasterGenerator(naming=CNaming('cloudabi_',
-                                               'cloudabi32_',
-                                               c11=False), ).generate_abi(abi)
-
-with open('freebsd/syscalls64.master', 'w') as f:
-    with redirect_stdout(f):
-        SyscallsMasterGenerator(naming=CNaming('cloudabi_',
-                                               'cloudabi64_',
-                                               c11=False), ).generate_abi(abi)
-
-with open_and_format('linux/cloudabi_syscalls.h') as f:
-    with redirect_stdout(f):
-        CLinuxSyscallsGenerator(
-            naming=CNaming('cloudabi_', c11=False, pointer_prefix='__user '),
-            header_guard='CLOUDABI_SYSCALLS_H',
-            machine_dep=False,
-            preamble='#include "cloudabi_types_common.h"\n').generate_abi(abi)
-
-with open_and_format('linux/cloudabi64_syscalls.h') as f:
-    with redirect_stdout(f):
-        CLinuxSyscallsGenerator(
-            naming=CNaming('cloudabi_',
-                           'cloudabi64_',
-                           c11=False,
-                           pointer_prefix='__user '),
-            header_guard='CLOUDABI64_SYSCALLS_H',
-            machine_dep=True,
-            preamble='#include "cloudabi64_types.h"\n').generate_abi(abi)
-
-with open_and_format('linux/cloudabi64_syscalls_table.h') as f:
-    with redirect_stdout(f):
-        CLinuxSyscallTableGenerator(
-            naming=CNaming('cloudabi_',
-                           'cloudabi64_',
-                           c11=False,
-                           pointer_prefix='__user '),
-            md_type=int_types['uint64'],
-            preamble='#include <asm/byteorder.h>\n'
-            '\n'
-            '#include "cloudabi_syscalls.h"\n'
-            '#include "cloudabi64_syscalls.h"\n').generate_abi(abi)
-
-with open('docs/cloudabi.md', 'w') as f:
-    with redirect_stdout(f):
-        MarkdownGenerator(
-            naming=MarkdownCNaming('cloudabi_'), ).generate_abi(abi)
-
-with open('docs/cloudabi-rust.md', 'w') as f:
-    with redirect_stdout(f):
-        MarkdownGenerator(naming=MarkdownRustNaming(), ).generate_abi(abi)
-
-html = subprocess.check_output('markdown docs/cloudabi.md', shell=True)
-with open('docs/cloudabi.html', 'wb') as f:
-    with open('parts/head.html', 'rb') as p:
-        f.write(p.read())
-    f.write(html)
-    with open('parts/foot.html', 'rb') as p:
-        f.write(p.read())
-
-html = subprocess.check_output('markdown docs/cloudabi-rust.md', shell=True)
-with open('docs/cloudabi-rust.html', 'wb') as f:
-    with open('parts/head.html', 'rb') as p:
-        f.write(p.read())
-    f.write(html)
-    with open('parts/foot.html', 'rb') as p:
-        f.write(p.read())
-
-for proc in procs:
-    proc.wait()
+import sys
+import time
+import traceback
+
+from generator.cache import TargetCache, hash_inputs
+from generator.output import (list_staged_files, read_file, read_staged_files,
+                              write_if_changed)
+from generator.targets import (clang_format, group_targets, render_group,
+                               select_targets, target_names)
+
+# The ABI is parsed once by the parent process and handed to every worker
+# process when it starts. It is pickled in advance, as the default recursion
+# limit does not suffice for pickling larger ABIs when workers are spawned
+# instead of forked.
+worker_abi = None
+
+
+def init_worker(data):
+    import pickle
+    global worker_abi
+    worker_abi = pickle.loads(data)
+
+
+def render_target_group(targets):
+    return render_group(targets, worker_abi)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description='Generate headers, sources and documentation from '
+        'cloudabi.txt.')
+    parser.add_argument(
+        '--only',
+        action='append',
+        metavar='TARGET',
+        help='only generate the given targets or groups of targets '
+        '(comma separated, may be repeated)')
+    parser.add_argument('--skip',
+                        action='append',
+                        metavar='TARGET',
+                        help='do not generate the given targets or groups '
+                        'of targets (comma separated, may be repeated)')
+    parser.add_argument('-o',
+                        '--output-dir',
+                        metavar='DIR',
+                        help='directory in which to store the generated '
+                        'files (default: the source tree)')
+    parser.add_argument('-j',
+                        '--jobs',
+                        type=int,
+                        help='number of worker processes to use')
+    parser.add_argument('--force',
+                        action='store_true',
+                        help='regenerate targets, even if they are up to '
+                        'date')
+    parser.add_argument('--check',
+                        action='store_true',
+                        help='compare the generated files against the ones '
+                        'on disk without writing anything, exiting with a '
+                        'non-zero status if they differ')
+    parser.add_argument('--staged',
+                        action='store_true',
+                        help='in combination with --check, compare against '
+                        'the files and cloudabi.txt in the Git index, using '
+                        'the version of the generator in the index')
+    parser.add_argument('--profile',
+                        metavar='TRACE',
+                        help='measure the time and memory used by every '
+                        'phase, writing them to a Chrome trace file')
+    parser.add_argument('--cprofile',
+                        metavar='DIR',
+                        help='in combination with --profile, store a '
+                        'cProfile dump for every target in a directory')
+    parser.add_argument('--watch',
+                        action='store_true',
+                        help='keep running, regenerating the targets '
+                        'affected by changes to cloudabi.txt, the generator '
+                        'or the license headers')
+    parser.add_argument('--list',
+                        action='store_true',
+                        help='list the names of all targets and groups')
+    args = parser.parse_args()
+    if args.cprofile is not None and args.profile is None:
+        parser.error('--cprofile requires --profile')
+    if args.profile is not None and args.watch:
+        parser.error('--profile cannot be combined with --watch')
+    if args.check and args.watch:
+        parser.error('--check cannot be combined with --watch')
+    if args.staged and not args.check:
+        parser.error('--staged requires --check')
+
+    names = target_names()
+    for option in ['only', 'skip']:
+        values = getattr(args, option)
+        if values is not None:
+            values = {v for value in values for v in value.split(',') if v}
+            for value in sorted(values - names):
+                parser.error('unknown target: {}'.format(value))
+            setattr(args, option, values)
+    return args
+
+
+def profile_phase(profiler, name, category='generate'):
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.phase(name, category)
+
+
+# Wraps the functions computing the ABI model that are not called as a
+# single phase, so that the time spent in them is accounted for separately.
+def instrument_model(profiler):
+    from generator import abi, itf, layout, parser
+    profiler.instrument(itf, '_parse_itf', 'itf')
+    for function in ['array', 'struct', 'union']:
+        profiler.instrument(layout.Layout, function, 'layout')
+    profiler.instrument(abi, '_compute_dependencies', 'dependencies')
+    profiler.instrument(parser.AbiParser, 'compute_used_by', 'used_by')
+
+
+def render_targets(targets, abi, jobs=None, profiler=None):
+    outputs = {}
+    if profiler is not None:
+        # Render targets one by one in this process, so that they can be
+        # measured individually.
+        for target in targets:
+            with profiler.phase(target.path):
+                text = profiler.call(target.path, target.generate, abi)
+            outputs[target.path] = text.encode('UTF-8')
+            if target.html is not None:
+                with profiler.phase(target.html, 'html'):
+                    outputs[target.html] = target.render_html(text)
+    else:
+        # Targets using the same backend are rendered together, so that
+        # the ABI is traversed only once for all of them. Only start worker
+        # processes if there is more than one group of targets.
+        groups = group_targets(targets)
+        if len(groups) == 1 or jobs == 1:
+            for group in groups:
+                outputs.update(render_group(group, abi))
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            from generator.abi_cache import dump_abi
+            with ProcessPoolExecutor(max_workers=jobs,
+                                     initializer=init_worker,
+                                     initargs=(dump_abi(abi), )) as executor:
+                for group_outputs in executor.map(render_target_group, groups):
+                    outputs.update(group_outputs)
+    with profile_phase(profiler, 'clang-format', 'format'):
+        outputs.update(
+            clang_format(
+                {t.path: outputs[t.path]
+                 for t in targets if t.clang_format}))
+    return outputs
+
+
+# Compares generated files against existing ones, printing a diff for every
+# file that is out of sync. Returns whether all files are in sync.
+def check_outputs(outputs, existing):
+    in_sync = True
+    for path in sorted(outputs):
+        if outputs[path] == existing[path]:
+            continue
+        in_sync = False
+        old = existing[path] or b''
+        sys.stdout.writelines(
+            difflib.unified_diff(
+                old.decode('UTF-8').splitlines(True),
+                outputs[path].decode('UTF-8').splitlines(True), 'a/' + path,
+                'b/' + path))
+    return in_sync
+
+
+def write_outputs(targets, outputs, output_dir, cache, keys):
+    for target in targets:
+        for path in target.outputs:
+            file_name = os.path.join(output_dir, path)
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+            if write_if_changed(file_name, outputs[path]):
+                print('Updated {}'.format(path))
+        cache.update(target, keys[target.path],
+                     [(path, outputs[path]) for path in target.outputs])
+    cache.save()
+
+
+# Model modules: changes to these require the specification to be reparsed.
+MODEL_MODULES = {'abi', 'itf', 'layout', 'parser'}
+
+
+# Returns the targets affected by changes to the provided files, given the
+# modules of the generator package that have been reloaded as a result.
+def affected_targets(targets, root, spec, changed, modules):
+    parts = os.path.join(root, 'parts')
+    if (spec in changed or os.path.join(parts, 'head') in changed
+            or 'targets' in modules or MODEL_MODULES.intersection(modules)):
+        return targets
+    html = (os.path.join(parts, 'head.html') in changed
+            or os.path.join(parts, 'foot.html') in changed)
+    return [
+        t for t in targets if t.backend[0] in modules or (
+            t.naming is not None and t.naming[0] in modules) or (
+                html and t.html is not None)
+    ]
+
+
+# Regenerates targets whenever their inputs change. The parsed ABI and the
+# modules of the generator package are kept in memory between cycles. Edited
+# modules are reloaded, together with the modules depending on them, and the
+# specification is only reparsed if it or the model modules have changed.
+def watch(args, root, spec, output_dir):
+    from generator.watch import (create_watcher, dependent_modules,
+                                 reload_modules, wait_for_changes)
+    global clang_format
+
+    package = os.path.join(root, 'generator')
+    watcher = create_watcher([spec] +
+                             glob.glob(os.path.join(package, '*.py')) +
+                             glob.glob(os.path.join(root, 'parts', '*')))
+    cache = TargetCache(os.path.join(output_dir, '.generate-cache.json'),
+                        output_dir)
+    abi = None
+    changed = None
+    while True:
+        try:
+            timings = []
+            start = time.perf_counter()
+            if changed is None:
+                modules = []
+            else:
+                modules = dependent_modules(
+                    os.path.splitext(os.path.basename(f))[0] for f in changed
+                    if os.path.dirname(f) == package and f.endswith('.py'))
+                if modules:
+                    reload_modules(modules)
+                    timings.append(('reload', time.perf_counter() - start))
+            targets_module = importlib.import_module('generator.targets')
+            # Pick up the reloaded version of the formatting function.
+            clang_format = targets_module.clang_format
+            targets = targets_module.select_targets(args.only, args.skip or ())
+
+            if abi is None or spec in changed or MODEL_MODULES.intersection(
+                    modules):
+                phase = time.perf_counter()
+                abi = importlib.import_module('generator.abi_cache').load_abi(
+                    spec)
+                timings.append(('parse', time.perf_counter() - phase))
+
+            inputs = hash_inputs(root, spec)
+            keys = {t.path: cache.target_key(inputs, t) for t in targets}
+            if changed is not None:
+                targets = affected_targets(targets, root, spec, changed,
+                                           modules)
+            elif not args.force:
+                targets = [
+                    t for t in targets if not cache.is_fresh(t, keys[t.path])
+                ]
+
+            # Render in this process, so that the warm modules are used.
+            phase = time.perf_counter()
+            outputs = render_targets(targets, abi, args.jobs or 1)
+            timings.append(('render', time.perf_counter() - phase))
+            phase = time.perf_counter()
+            write_outputs(targets, outputs, output_dir, cache, keys)
+            timings.append(('write', time.perf_counter() - phase))
+
+            print('Regenerated {} target(s) in {:.3f}s ({})'.format(
+                len(targets),
+                time.perf_counter() - start,
+                ', '.join('{} {:.3f}s'.format(name, seconds)
+                          for name, seconds in timings)))
+        except Exception:
+            traceback.print_exc()
+        sys.stdout.flush()
+        changed = wait_for_changes(watcher)
+
+
+def check(args, root, spec, output_dir, targets, profiler):
+    # Render all targets in memory, bypassing all caches.
+    from generator.itf import parse_itf
+    from generator.parser import AbiParser
+    paths = [path for t in targets for path in t.outputs]
+    if args.staged:
+        existing = read_staged_files(root, ['cloudabi.txt'] + paths)
+        text = existing.pop('cloudabi.txt').decode('UTF-8')
+    else:
+        existing = {
+            path: read_file(os.path.join(output_dir, path))
+            for path in paths
+        }
+        with open(spec) as f:
+            text = f.read()
+    with profile_phase(profiler, 'parse', 'parse'):
+        abi = AbiParser().parse_abi(
+            parse_itf(text.splitlines(True), 'cloudabi.txt'))
+    if not check_outputs(render_targets(targets, abi, args.jobs, profiler),
+                         existing):
+        sys.exit(1)
+
+
+# The files making up the generator, as opposed to its input and outputs.
+GENERATOR_PATHS = ['generate.py', 'generator', 'parts']
+
+
+# Runs generate.py using the version of the generator stored in the Git
+# index, if it differs from the one in the working tree. The staged files
+# are copied to a temporary directory, from which generate.py is run with
+# the same arguments, still using the index of this repository. Returns its
+# exit status, or None if the working tree matches the index.
+def run_staged_generator(root):
+    files = list_staged_files(root, GENERATOR_PATHS)
+    staged = read_staged_files(root, files)
+    if all(staged[f] == read_file(os.path.join(root, f)) for f in files):
+        return None
+
+    import subprocess
+    import tempfile
+    git_dir = subprocess.run(['git', 'rev-parse', '--absolute-git-dir'],
+                             stdout=subprocess.PIPE,
+                             cwd=root,
+                             check=True).stdout.decode('UTF-8').strip()
+    with tempfile.TemporaryDirectory() as directory:
+        for f in files:
+            os.makedirs(os.path.dirname(os.path.join(directory, f)),
+                        exist_ok=True)
+            with open(os.path.join(directory, f), 'wb') as out:
+                out.write(staged[f])
+        env = dict(os.environ, GIT_DIR=git_dir, GIT_WORK_TREE=directory)
+        return subprocess.run(
+            [sys.executable,
+             os.path.join(directory, 'generate.py')] + sys.argv[1:],
+            env=env).returncode
+
+
+def regenerate(args, root, spec, output_dir, targets, profiler):
+    # Only regenerate the targets whose inputs have changed.
+    cache = TargetCache(os.path.join(output_dir, '.generate-cache.json'),
+                        output_dir)
+    inputs = hash_inputs(root, spec)
+    keys = {t.path: cache.target_key(inputs, t) for t in targets}
+    if not args.force:
+        targets = [t for t in targets if not cache.is_fresh(t, keys[t.path])]
+    if not targets:
+        return
+
+    with profile_phase(profiler, 'parse', 'parse'):
+        if profiler is None:
+            from generator.abi_cache import load_abi
+            abi = load_abi(spec)
+        else:
+            # Loading the cached ABI would skip the phases of parsing that
+            # are being measured, so always parse the specification.
+            from generator.parser import AbiParser
+            abi = AbiParser().parse_abi_file(spec)
+    outputs = render_targets(targets, abi, args.jobs, profiler)
+    with profile_phase(profiler, 'write', 'write'):
+        write_outputs(targets, outputs, output_dir, cache, keys)
+
+
+def main():
+    args = parse_arguments()
+    if args.list:
+        for name in sorted(target_names()):
+            print(name)
+        return
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    spec = os.path.join(root, 'cloudabi.txt')
+    output_dir = args.output_dir if args.output_dir is not None else root
+    targets = select_targets(args.only, args.skip or ())
+
+    if args.staged:
+        status = run_staged_generator(root)
+        if status is not None:
+            sys.exit(status)
+
+    if args.watch:
+        try:
+            watch(args, root, spec, output_dir)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    profiler = None
+    if args.profile is not None:
+        from generator.profiling import Profiler
+        profiler = Profiler(args.cprofile)
+        instrument_model(profiler)
+    try:
+        if args.check:
+            check(args, root, spec, output_dir, targets, profiler)
+        else:
+            regenerate(args, root, spec, output_dir, targets, profiler)
+    finally:
+        if profiler is not None:
+            profiler.finish(args.profile)
+
+
+if __name__ == '__main__':
+    main()
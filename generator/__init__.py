@@ -0,0 +1,25 @@
+# Copyright (c) 2016 Nuxi (https://nuxi.nl/) and contributors.
+#
+# SPDX-License-Identifier: BSD-2-Clause
+
+# Registry of the backends and naming schemes that targets can be generated
+# with. Their modules are only imported once a class from them is requested,
+# so that using the package to inspect an ABI doesn't load any of them.
+
+import importlib
+
+BACKEND_MODULES = frozenset([
+    'asm',
+    'c',
+    'c_naming',
+    'markdown',
+    'rust',
+    'rust_naming',
+    'syscalls_master',
+])
+
+
+def load_class(module, name):
+    if module not in BACKEND_MODULES:
+        raise Exception('Unknown backend module: {}'.format(module))
+    return getattr(importlib.import_module('.' + module, __name__), name)
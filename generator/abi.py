@@ -2,24 +2,82 @@
 #
 # SPDX-License-Identifier: BSD-2-Clause
 
+# The model of an ABI consists of many small objects, which is why all of
+# their classes use __slots__. Types without a name, such as pointers and
+# arrays, are fully determined by the arguments of their constructors. These
+# are interned, so that all occurrences of the same type in the
+# specification share a single immutable object.
+
+import weakref
+
 from .itf import read_itf
-from .layout import Layout
+from .layout import *
+
+
+# Metaclass of types that are interned. Calling the class returns the
+# existing object constructed with the same arguments if there is one.
+class _Interned(type):
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        code = cls.__init__.__code__
+        cls._parameters = code.co_varnames[1:code.co_argcount]
+        defaults = cls.__init__.__defaults__ or ()
+        cls._defaults = dict(
+            zip(cls._parameters[len(cls._parameters) - len(defaults):],
+                defaults))
+        cls._instances = weakref.WeakValueDictionary()
+
+    def __call__(cls, *args, **kwargs):
+        try:
+            key = args + tuple(kwargs[p] if p in kwargs else cls._defaults[p]
+                               for p in cls._parameters[len(args):])
+        except KeyError:
+            # Let the constructor report the missing argument.
+            return super().__call__(*args, **kwargs)
+        obj = cls._instances.get(key)
+        if obj is None:
+            obj = super().__call__(*args, **kwargs)
+            cls._instances[key] = obj
+        return obj
+
+
+# Cache of values computed for objects of the model, such as the names that
+# backends use for types. Values are stored per object, under a further
+# hashable key. They are discarded along with the object, so that a cache
+# may outlive the ABI it was filled with.
+class ModelCache:
+    def __init__(self):
+        self._values = weakref.WeakKeyDictionary()
+
+    def get(self, obj, key, compute):
+        values = self._values.get(obj)
+        if values is None:
+            values = self._values[obj] = {}
+        if key not in values:
+            values[key] = compute()
+        return values[key]
 
 
 class Type:
+    __slots__ = ('name', 'layout', '__weakref__')
+
     def __init__(self, name, layout=None):
         self.name = name
         self.layout = layout
 
 
-class VoidType(Type):
+class VoidType(Type, metaclass=_Interned):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__('void', layout=Layout(None))
 
 
 class IntType(Type):
+    __slots__ = ()
+
     def __init__(self, name, size):
-        super().__init__(name, layout=Layout(size))
+        super().__init__(name, layout=Layout.scalar(size))
 
 
 int_types = {
@@ -32,42 +90,66 @@ int_types = {
     'int16': IntType('int16', 2),
     'int32': IntType('int32', 4),
     'int64': IntType('int64', 8),
-    'size': IntType('size', (4, 8)),
+    'size': IntType('size',
+                    Layout.pointer().size),
 }
 
 
 class UserDefinedType(Type):
-    pass
+    __slots__ = ('doc', 'used_by')
 
 
 class IntLikeType(UserDefinedType):
+    __slots__ = ('int_type', 'values', 'cprefix', 'values_by_name',
+                 'values_by_value')
+
     def __init__(self, name, int_type, values, cprefix=None):
         super().__init__(name, layout=int_type.layout)
         self.int_type = int_type
         self.values = values
         self.cprefix = cprefix if cprefix is not None else name.upper() + '_'
 
+        # Lookup tables of the values by name, and by numerical value. As
+        # multiple names may share a numerical value, the latter maps to a
+        # list of values in the order in which they were declared.
+        self.values_by_name = {}
+        self.values_by_value = {}
+        for v in values:
+            if v.name in self.values_by_name:
+                raise Exception('Duplicate value {} in {}'.format(
+                    v.name, name))
+            self.values_by_name[v.name] = v
+            self.values_by_value.setdefault(v.value, []).append(v)
+
+    # Returns the name of a numerical value, being the name of the value
+    # declared first if multiple share it, or None if there is none.
+    def value_name(self, value):
+        values = self.values_by_value.get(value)
+        return values[0].name if values else None
+
 
 class SpecialValue:
+    __slots__ = ('name', 'value', 'doc')
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
 
 
 class AliasType(IntLikeType):
-    pass
+    __slots__ = ()
 
 
 class OpaqueType(IntLikeType):
-    pass
+    __slots__ = ()
 
 
 class EnumType(IntLikeType):
-    pass
+    __slots__ = ()
 
 
 class FlagsType(IntLikeType):
-    pass
+    __slots__ = ()
 
 
 int_like_types = {
@@ -78,31 +160,42 @@ int_like_types = {
 }
 
 
-class ArrayType(Type):
+class ArrayType(Type, metaclass=_Interned):
+    __slots__ = ('count', 'element_type')
+
     def __init__(self, count, element_type):
         super().__init__(None, layout=Layout.array(element_type, count))
         self.count = count
         self.element_type = element_type
 
 
-class PointerType(Type):
+_pointer_layout = Layout.pointer()
+
+
+class PointerType(Type, metaclass=_Interned):
+    __slots__ = ('const', 'target_type')
+
     def __init__(self, target_type=VoidType(), const=False):
-        super().__init__(None, layout=Layout((4, 8), (4, 8)))
+        super().__init__(None, layout=_pointer_layout)
         self.const = const
         self.target_type = target_type
 
 
 class OutputPointerType(PointerType):
-    pass
+    __slots__ = ()
 
 
-class AtomicType(Type):
+class AtomicType(Type, metaclass=_Interned):
+    __slots__ = ('target_type', )
+
     def __init__(self, target_type):
         super().__init__(None, layout=target_type.layout)
         self.target_type = target_type
 
 
 class StructType(UserDefinedType):
+    __slots__ = ('members', 'raw_members', 'dependencies')
+
     def __init__(self, name, members):
         self.members = members
         self.raw_members = []
@@ -116,6 +209,8 @@ class StructType(UserDefinedType):
 
 
 class StructMember:
+    __slots__ = ('name', 'layout', 'offset', 'doc')
+
     def __init__(self, name, layout=None):
         self.name = name
         self.layout = layout
@@ -123,6 +218,8 @@ class StructMember:
 
 
 class SimpleStructMember(StructMember):
+    __slots__ = ('type', 'special_values')
+
     def __init__(self, name, type, special_values=None):
         super().__init__(name, layout=type.layout)
         self.type = type
@@ -130,6 +227,8 @@ class SimpleStructMember(StructMember):
 
 
 class RangeStructMember(StructMember):
+    __slots__ = ('const', 'target_type', 'raw_members')
+
     def __init__(self, name, const, target_type):
         super().__init__(name, layout=None)
         self.const = const
@@ -141,6 +240,8 @@ class RangeStructMember(StructMember):
 
 
 class VariantStructMember(StructMember):
+    __slots__ = ('tag', 'members')
+
     def __init__(self, tag, members):
         super().__init__(None, layout=Layout.union(members))
         self.tag = tag
@@ -148,6 +249,8 @@ class VariantStructMember(StructMember):
 
 
 class VariantMember:
+    __slots__ = ('name', 'tag_values', 'type', 'layout', 'doc')
+
     def __init__(self, name, tag_values, type):
         self.name = name
         self.tag_values = tag_values
@@ -156,16 +259,22 @@ class VariantMember:
 
 
 class FunctionType(UserDefinedType):
-    def __init__(self, name, parameters, return_type):
+    __slots__ = ('parameters', 'return_type', 'return_doc', 'dependencies')
+
+    def __init__(self, name, parameters, return_type, return_doc=''):
         machine_dep = (parameters.layout.machine_dep
                        or return_type.layout.machine_dep)
         super().__init__(name, layout=Layout(None, None, machine_dep))
         self.parameters = parameters
         self.return_type = return_type
+        self.return_doc = return_doc
         self.dependencies = _compute_dependencies(self)
 
 
 class Syscall:
+    __slots__ = ('name', 'input', 'output', 'noreturn', 'machine_dep',
+                 'dependencies', 'doc', '__weakref__')
+
     def __init__(self, name, input, output, noreturn=False):
         self.name = name
         self.input = input
@@ -183,10 +292,132 @@ class Syscall:
         return False
 
 
+# Dictionary that keeps values computed from its contents as attributes,
+# which are discarded when the dictionary is modified.
+class _DerivedDict(dict):
+    def _invalidate(self):
+        self.__dict__.clear()
+
+    def __setitem__(self, name, value):
+        super().__setitem__(name, value)
+        self._invalidate()
+
+    def __delitem__(self, name):
+        super().__delitem__(name)
+        self._invalidate()
+
+    def clear(self):
+        super().clear()
+        self._invalidate()
+
+    def pop(self, *args):
+        self._invalidate()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._invalidate()
+        return super().popitem()
+
+    def setdefault(self, name, value=None):
+        self._invalidate()
+        return super().setdefault(name, value)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._invalidate()
+
+    def __ior__(self, other):
+        super().__ior__(other)
+        self._invalidate()
+        return self
+
+
+# Dictionary of types indexed by name, which also keeps track of the order
+# in which they depend on each other. The order is computed when first
+# needed and discarded when the dictionary is modified.
+class TypeTable(_DerivedDict):
+    def by_dependency(self):
+        order = self.__dict__.get('_order')
+        if order is None:
+            order = order_types(self)
+            self._order = order
+        return order
+
+
+# Dictionary of syscalls indexed by name, which also keeps track of the
+# numbers assigned to them. Syscalls are numbered in alphabetical order. The
+# numbering is computed when first needed and discarded when the dictionary
+# is modified.
+class SyscallTable(_DerivedDict):
+    # Returns a tuple of all syscalls ordered by number, and a dictionary
+    # mapping the names of the syscalls to their numbers.
+    def numbering(self):
+        numbering = self.__dict__.get('_numbering')
+        if numbering is None:
+            ordered = tuple(self[name] for name in sorted(self))
+            numbering = (ordered, {
+                s.name: number
+                for number, s in enumerate(ordered)
+            })
+            self._numbering = numbering
+        return numbering
+
+
+# Reverse dependency graph of the types and syscalls of an ABI, built in a
+# single pass over their dependencies.
+class DependencyIndex:
+    def __init__(self, things=()):
+        self._dependents = {}
+        for thing in things:
+            self.add(thing)
+
+    def add(self, thing):
+        for dependency in getattr(thing, 'dependencies', ()):
+            self._dependents.setdefault(dependency, set()).add(thing)
+
+    # Returns the types and syscalls that depend on a type directly.
+    def direct(self, type):
+        return frozenset(self._dependents.get(type, ()))
+
+    # Returns the types and syscalls that depend on a type, either directly
+    # or through other types.
+    def transitive(self, type):
+        result = set()
+        pending = [type]
+        while pending:
+            for thing in self._dependents.get(pending.pop(), ()):
+                if thing not in result:
+                    result.add(thing)
+                    pending.append(thing)
+        return frozenset(result)
+
+
 class Abi:
     def __init__(self):
-        self.types = {}
-        self.syscalls = {}
+        self.types = TypeTable()
+        self.syscalls = SyscallTable()
+        self.dependents = DependencyIndex()
+        self.symbols = None
+
+    # Builds the table of all dotted paths that can be resolved starting at
+    # the top level: types, syscalls, values of types and members of structs,
+    # including those of variants. When names are ambiguous, the table
+    # resolves paths the same way resolve_name does, to the first match.
+    def index_symbols(self):
+        symbols = {}
+
+        def add(prefix, path, obj):
+            for name, child in _symbol_children(obj):
+                key = prefix + '.' + name
+                if key not in symbols:
+                    symbols[key] = path + (child, )
+                    add(key, symbols[key], child)
+
+        for obj in list(self.types.values()) + list(self.syscalls.values()):
+            if obj.name not in symbols:
+                symbols[obj.name] = (obj, )
+                add(obj.name, symbols[obj.name], obj)
+        self.symbols = symbols
 
     def resolve_name(self, name, root=None):
         if root is None:
@@ -195,9 +426,7 @@ class Abi:
             elif name in self.syscalls:
                 return self.syscalls[name]
         elif isinstance(root, IntLikeType):
-            for v in root.values:
-                if v.name == name:
-                    return v
+            return root.values_by_name.get(name)
         elif isinstance(root, StructType):
             for m in root.members:
                 if m.name == name:
@@ -216,6 +445,15 @@ class Abi:
                     return m
 
     def resolve_path(self, path, root=None):
+        if root is None:
+            if self.symbols is None:
+                self.index_symbols()
+            objs = self.symbols.get(path)
+            # The table is not updated when types or syscalls are added or
+            # replaced after it is built. Resolve the path name by name if it
+            # has no entry, or if the entry refers to a replaced object.
+            if objs is not None and self.resolve_name(objs[0].name) is objs[0]:
+                return list(objs)
         name, dot, rest = path.partition('.')
         obj = self.resolve_name(name, root)
         if obj is None:
@@ -227,8 +465,90 @@ class Abi:
             return [obj] + objs
         return [obj]
 
+    # Returns all types ordered by their dependencies.
+    def types_by_dependency(self):
+        return self.types.by_dependency()
+
     def syscall_number(self, syscall):
-        return sorted(self.syscalls).index(syscall.name)
+        return self.syscalls.numbering()[1][syscall.name]
+
+    def syscall_number_by_name(self, name):
+        return self.syscalls.numbering()[1][name]
+
+    def syscall_by_number(self, number):
+        return self.syscalls.numbering()[0][number]
+
+    # Returns all syscalls, ordered by their numbers.
+    def syscalls_by_number(self):
+        return self.syscalls.numbering()[0]
+
+
+# Orders a dictionary of types such that every type is listed after the
+# types it depends on. Types are grouped into rounds, sorted by name within
+# each round. Int-like types come first. Every other type is placed in the
+# earliest round in which all of its dependencies are placed either in an
+# earlier round, or earlier in the same round.
+def order_types(types):
+    names = {t: name for name, t in types.items()}
+    dependents = {t: [] for t in names}
+    pending = {}
+    for t in names:
+        deps = getattr(t, 'dependencies', set())
+        for d in deps:
+            if d not in names:
+                raise Exception('Type {} depends on unknown type {}'.format(
+                    names[t], d.name))
+            dependents[d].append(t)
+        pending[t] = len(deps)
+
+    rounds = {}
+    ready = [t for t, count in pending.items() if count == 0]
+    while ready:
+        t = ready.pop()
+        r = 1 if isinstance(t, IntLikeType) else 2
+        for d in getattr(t, 'dependencies', set()):
+            r = max(r, rounds[d] if names[d] < names[t] else rounds[d] + 1)
+        rounds[t] = r
+        for u in dependents[t]:
+            pending[u] -= 1
+            if pending[u] == 0:
+                ready.append(u)
+
+    if len(rounds) < len(names):
+        # Follow unplaced dependencies until a type is visited twice.
+        t = min((t for t in names if t not in rounds), key=names.get)
+        cycle = []
+        while t not in cycle:
+            cycle.append(t)
+            t = min((d for d in t.dependencies if d not in rounds),
+                    key=names.get)
+        cycle = cycle[cycle.index(t):] + [t]
+        raise Exception('Dependency cycle between types: {}'.format(
+            ' -> '.join(names[t] for t in cycle)))
+
+    return sorted(names, key=lambda t: (rounds[t], names[t]))
+
+
+# Yields the names and objects that resolve_name can find within an object,
+# in the order in which it searches for them.
+def _symbol_children(obj):
+    if isinstance(obj, IntLikeType):
+        for v in obj.values:
+            yield v.name, v
+    elif isinstance(obj, StructType):
+        for m in obj.members:
+            if m.name is not None:
+                yield m.name, m
+            elif isinstance(m, VariantStructMember):
+                for mm in m.members:
+                    if mm.name is not None:
+                        yield mm.name, mm
+                    else:
+                        yield from _symbol_children(mm)
+    elif isinstance(obj, VariantMember):
+        for m in obj.type.members:
+            if m.name is not None:
+                yield m.name, m
 
 
 def _compute_dependencies(thing):
@@ -0,0 +1,65 @@
+# Copyright (c) 2016 Nuxi (https://nuxi.nl/) and contributors.
+#
+# SPDX-License-Identifier: BSD-2-Clause
+
+# Serialized form of a fully resolved Abi, stored next to the specification
+# it was parsed from. This allows tools to obtain the ABI model without
+# paying the cost of parsing the specification and computing its layouts.
+#
+# The cache file starts with a line containing a hash of the specification
+# and the sources of the modules defining the ABI model, followed by the
+# pickled Abi object. The cache is discarded if the hash does not match.
+
+import hashlib
+import os
+import pickle
+import sys
+
+from .output import write_if_changed
+from .parser import AbiParser
+
+_MODEL_SOURCES = ['abi.py', 'itf.py', 'layout.py', 'parser.py']
+
+
+def cache_file_name(file_name):
+    return os.path.splitext(file_name)[0] + '.pickle'
+
+
+def _hash_abi_file(file_name):
+    h = hashlib.sha256()
+    with open(file_name, 'rb') as f:
+        h.update(f.read())
+    for source in _MODEL_SOURCES:
+        with open(os.path.join(os.path.dirname(__file__), source), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest().encode('ASCII') + b'\n'
+
+
+# The ABI model is a densely linked graph of objects, which the pickle module
+# traverses recursively. Allow for a recursion depth proportional to its size.
+def dump_abi(abi):
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 4 * (len(abi.types) + len(abi.syscalls))))
+    try:
+        return pickle.dumps(abi, pickle.HIGHEST_PROTOCOL)
+    finally:
+        sys.setrecursionlimit(limit)
+
+
+def load_abi(file_name):
+    cache_name = cache_file_name(file_name)
+    digest = _hash_abi_file(file_name)
+    try:
+        with open(cache_name, 'rb') as f:
+            data = f.read()
+        if data.startswith(digest):
+            return pickle.loads(data[len(digest):])
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+
+    abi = AbiParser().parse_abi_file(file_name)
+    try:
+        write_if_changed(cache_name, digest + dump_abi(abi))
+    except (OSError, RecursionError):
+        pass
+    return abi
@@ -24,27 +24,28 @@ class AsmVdsoGenerator(Generator):
         super().generate_head(abi)
 
         # Macros for opening/closing function bodies.
-        print('#define ENTRY(name)      \\')
-        print('  .text;                 \\')
-        print('  .p2align %-13s \\' % (self._function_alignment + ';'))
-        print('  .global name;          \\')
-        print('  .type name, %cfunction; \\' % self._type_character)
-        print('name:')
-        print()
-        print('#define END(name) .size name, . - name')
+        self.out.print('#define ENTRY(name)      \\')
+        self.out.print('  .text;                 \\')
+        self.out.print('  .p2align %-13s \\' %
+                       (self._function_alignment + ';'))
+        self.out.print('  .global name;          \\')
+        self.out.print('  .type name, %cfunction; \\' % self._type_character)
+        self.out.print('name:')
+        self.out.print()
+        self.out.print('#define END(name) .size name, . - name')
 
     def generate_syscalls(self, abi, syscalls):
-        for s in sorted(abi.syscalls):
-            self.generate_syscall(abi, abi.syscalls[s])
+        for syscall in abi.syscalls_by_number():
+            self.generate_syscall(abi, syscall)
 
     def generate_syscall(self, abi, syscall):
-        print()
-        print('ENTRY(cloudabi_sys_{})'.format(syscall.name))
+        self.out.print()
+        self.out.print('ENTRY(cloudabi_sys_{})'.format(syscall.name))
         self.generate_syscall_body(abi.syscall_number(syscall),
                                    syscall.input.raw_members,
                                    syscall.output.raw_members,
                                    syscall.noreturn)
-        print('END(cloudabi_sys_{})'.format(syscall.name))
+        self.out.print('END(cloudabi_sys_{})'.format(syscall.name))
 
     def generate_foot(self, abi):
         super().generate_foot(abi)
@@ -140,48 +141,43 @@ class AsmVdsoAarch64Generator(AsmVdsoCommonGenerator):
     def register_count(member):
         return howmany(member.type.layout.size[1], 8)
 
-    @staticmethod
-    def print_push_addresses(regs):
+    def print_push_addresses(self, regs):
         if len(regs) == 1:
-            print('  str x{}, [sp, #-8]'.format(regs[0]))
+            self.out.print('  str x{}, [sp, #-8]'.format(regs[0]))
         else:
             assert len(regs) == 2
-            print('  stp x{}, x{}, [sp, #-16]'.format(regs[0], regs[1]))
+            self.out.print('  stp x{}, x{}, [sp, #-16]'.format(
+                regs[0], regs[1]))
 
-    @staticmethod
-    def print_syscall(number):
-        print('  mov w8, #{}'.format(number))
-        print('  svc #0')
+    def print_syscall(self, number):
+        self.out.print('  mov w8, #{}'.format(number))
+        self.out.print('  svc #0')
 
-    @staticmethod
-    def print_pop_addresses(regs):
+    def print_pop_addresses(self, regs):
         if len(regs) == 1:
-            print('  ldr x{}, [sp, #-8]'.format(regs[0]))
+            self.out.print('  ldr x{}, [sp, #-8]'.format(regs[0]))
         else:
             assert len(regs) == 2
-            print('  ldp x{}, x{}, [sp, #-16]'.format(regs[0], regs[1]))
+            self.out.print('  ldp x{}, x{}, [sp, #-16]'.format(
+                regs[0], regs[1]))
 
-    @staticmethod
-    def print_jump_syscall_failed(label):
-        print('  b.cs ' + label)
+    def print_jump_syscall_failed(self, label):
+        self.out.print('  b.cs ' + label)
 
-    @staticmethod
-    def print_store_output(member, reg_from, reg_to, index):
+    def print_store_output(self, member, reg_from, reg_to, index):
         assert index == 0
         size = member.type.layout.size[1]
-        print('  str {}{}, [x{}]'.format({
+        self.out.print('  str {}{}, [x{}]'.format({
             4: 'w',
             8: 'x'
         }[size], reg_from, reg_to))
 
-    @staticmethod
-    def print_retval_success():
-        print('  mov w0, wzr')
-        print('1:')
+    def print_retval_success(self):
+        self.out.print('  mov w0, wzr')
+        self.out.print('1:')
 
-    @staticmethod
-    def print_return():
-        print('  ret')
+    def print_return(self):
+        self.out.print('  ret')
 
 
 class AsmVdsoArmv6Generator(AsmVdsoCommonGenerator):
@@ -201,64 +197,56 @@ class AsmVdsoArmv6Generator(AsmVdsoCommonGenerator):
     def register_count(member):
         return howmany(member.type.layout.size[0], 4)
 
-    @staticmethod
-    def print_push_addresses(regs):
+    def print_push_addresses(self, regs):
         if len(regs) == 1:
-            print('  str r{}, [sp, #-4]'.format(regs[0]))
+            self.out.print('  str r{}, [sp, #-4]'.format(regs[0]))
         else:
             assert len(regs) == 2
-            print('  str r{}, [sp, #-4]'.format(regs[0]))
-            print('  str r{}, [sp, #-8]'.format(regs[1]))
+            self.out.print('  str r{}, [sp, #-4]'.format(regs[0]))
+            self.out.print('  str r{}, [sp, #-8]'.format(regs[1]))
 
-    @staticmethod
-    def print_syscall(number):
-        print('  mov ip, #{}'.format(number))
-        print('  swi 0')
+    def print_syscall(self, number):
+        self.out.print('  mov ip, #{}'.format(number))
+        self.out.print('  swi 0')
 
-    @staticmethod
-    def print_pop_addresses(regs):
+    def print_pop_addresses(self, regs):
         if len(regs) == 1:
-            print('  ldrcc r{}, [sp, #-4]'.format(regs[0]))
+            self.out.print('  ldrcc r{}, [sp, #-4]'.format(regs[0]))
         else:
             assert len(regs) == 2
-            print('  ldrcc r{}, [sp, #-4]'.format(regs[0]))
-            print('  ldrcc r{}, [sp, #-8]'.format(regs[1]))
+            self.out.print('  ldrcc r{}, [sp, #-4]'.format(regs[0]))
+            self.out.print('  ldrcc r{}, [sp, #-8]'.format(regs[1]))
 
     @staticmethod
     def print_jump_syscall_failed(label):
         pass
 
-    @staticmethod
-    def print_load_address_from_stack(slot, reg):
-        print('  ldrcc r{}, [sp, #{}]'.format(reg, slot * 4))
+    def print_load_address_from_stack(self, slot, reg):
+        self.out.print('  ldrcc r{}, [sp, #{}]'.format(reg, slot * 4))
 
-    @staticmethod
-    def print_store_output(member, reg_from, reg_to, index):
+    def print_store_output(self, member, reg_from, reg_to, index):
         size = member.type.layout.size[0]
-        print('  strcc {}{}, [r{}{}]'.format({
+        self.out.print('  strcc {}{}, [r{}{}]'.format({
             4: 'r',
             8: 'r'
         }[size], reg_from, reg_to, ', #{}'.format(index *
                                                   4) if size > 4 else ''))
 
-    @staticmethod
-    def print_retval_success():
-        print('  movcc r0, #0')
+    def print_retval_success(self):
+        self.out.print('  movcc r0, #0')
 
-    @staticmethod
-    def print_return():
-        print('  bx lr')
+    def print_return(self):
+        self.out.print('  bx lr')
 
 
 class AsmVdsoArmv6On64bitGenerator(AsmVdsoGenerator):
     def __init__(self):
         super().__init__(function_alignment='2', type_character='%')
 
-    @staticmethod
-    def load_argument(offset):
+    def load_argument(self, offset):
         if offset < 16:
             return 'r{}'.format(offset // 4)
-        print('  ldr r1, [sp, #{}]'.format(offset - 16))
+        self.out.print('  ldr r1, [sp, #{}]'.format(offset - 16))
         return 'r1'
 
     def generate_syscall_body(self, number, args_input, args_output, noreturn):
@@ -285,18 +273,19 @@ class AsmVdsoArmv6On64bitGenerator(AsmVdsoGenerator):
                 # Argument whose size doesn't differ between systems.
                 for i in range(0, howmany(member.type.layout.size[0], 4)):
                     register = self.load_argument(offset_in + i * 4)
-                    print('  str {}, [sp, #{}]'.format(register,
-                                                       offset_out + i * 4))
+                    self.out.print('  str {}, [sp, #{}]'.format(
+                        register, offset_out + i * 4))
             else:
                 # Pointer or size_t. Zero-extend it to 64 bits.
                 assert member.type.layout.size[0] == 4
                 assert member.type.layout.size[1] == 8
                 register = self.load_argument(offset_in)
-                print('  str {}, [sp, #{}]'.format(register, offset_out))
+                self.out.print('  str {}, [sp, #{}]'.format(
+                    register, offset_out))
                 if not r0_is_zero:
-                    print('  mov r0, #0')
+                    self.out.print('  mov r0, #0')
                     r0_is_zero = True
-                print('  str r0, [sp, #{}]'.format(offset_out + 4))
+                self.out.print('  str r0, [sp, #{}]'.format(offset_out + 4))
             offset_in += roundup(member.type.layout.size[0], 4)
             offset_out += roundup(member.type.layout.size[1], 8)
         assert offset_out <= 0
@@ -309,16 +298,17 @@ class AsmVdsoArmv6On64bitGenerator(AsmVdsoGenerator):
             if reg_from < 4:
                 # Move the value to a register that is retained.
                 offset_out -= 4
-                print('  str r{}, [sp, #{}]'.format(reg_from, offset_out))
+                self.out.print('  str r{}, [sp, #{}]'.format(
+                    reg_from, offset_out))
                 slots_out.append(offset_out)
             else:
                 # Value is stored on the stack. No need to preserve.
                 slots_out.append((reg_from - 4) * 4)
 
         # Invoke system call.
-        print('  mov r0, #{}'.format(number))
-        print('  sub r2, sp, #{}'.format(slots_stack * 8))
-        print('  swi 0')
+        self.out.print('  mov r0, #{}'.format(number))
+        self.out.print('  sub r2, sp, #{}'.format(slots_stack * 8))
+        self.out.print('  swi 0')
 
         if not noreturn:
             if args_output:
@@ -329,14 +319,14 @@ class AsmVdsoArmv6On64bitGenerator(AsmVdsoGenerator):
                     assert (size == member.type.layout.size[1]
                             or (size == 4 and member.type.layout.size[1] == 8))
                     assert size % 4 == 0
-                    print('  ldrcc r1, [sp, #{}]'.format(slot))
+                    self.out.print('  ldrcc r1, [sp, #{}]'.format(slot))
                     for i in range(0, howmany(size, 4)):
-                        print('  ldrcc r2, [sp, #{}]'.format(offset_in +
-                                                             i * 4))
-                        print('  strcc r2, [r1, #{}]'.format(i * 4))
+                        self.out.print(
+                            '  ldrcc r2, [sp, #{}]'.format(offset_in + i * 4))
+                        self.out.print('  strcc r2, [r1, #{}]'.format(i * 4))
                     offset_in += roundup(member.type.layout.size[1], 8)
                     offset_out += 4
-            print('  bx lr')
+            self.out.print('  bx lr')
 
 
 class AsmVdsoI686Generator(AsmVdsoCommonGenerator):
@@ -356,35 +346,29 @@ class AsmVdsoI686Generator(AsmVdsoCommonGenerator):
     def register_count(member):
         return howmany(member.type.layout.size[0], 4)
 
-    @staticmethod
-    def print_syscall(number):
-        print('  mov ${}, %eax'.format(number))
-        print('  int $0x80')
+    def print_syscall(self, number):
+        self.out.print('  mov ${}, %eax'.format(number))
+        self.out.print('  int $0x80')
 
-    @staticmethod
-    def print_jump_syscall_failed(label):
-        print('  jc ' + label)
+    def print_jump_syscall_failed(self, label):
+        self.out.print('  jc ' + label)
 
-    @staticmethod
-    def print_load_address_from_stack(slot, reg):
-        print('  mov {}(%esp), %e{}'.format(slot * 4 + 4, reg))
+    def print_load_address_from_stack(self, slot, reg):
+        self.out.print('  mov {}(%esp), %e{}'.format(slot * 4 + 4, reg))
 
-    @staticmethod
-    def print_store_output(member, reg_from, reg_to, index):
+    def print_store_output(self, member, reg_from, reg_to, index):
         size = member.type.layout.size[0]
-        print('  mov {}{}, {}(%e{})'.format({
+        self.out.print('  mov {}{}, {}(%e{})'.format({
             4: '%e',
             8: '%e'
         }[size], reg_from, index * 4 if size > 4 else '', reg_to))
 
-    @staticmethod
-    def print_retval_success():
-        print('  xor %eax, %eax')
-        print('1:')
+    def print_retval_success(self):
+        self.out.print('  xor %eax, %eax')
+        self.out.print('1:')
 
-    @staticmethod
-    def print_return():
-        print('  ret')
+    def print_return(self):
+        self.out.print('  ret')
 
 
 class AsmVdsoI686On64bitGenerator(AsmVdsoGenerator):
@@ -392,8 +376,8 @@ class AsmVdsoI686On64bitGenerator(AsmVdsoGenerator):
         super().__init__(function_alignment='2, 0x90', type_character='@')
 
     def generate_syscall_body(self, number, args_input, args_output, noreturn):
-        print('  push %ebp')
-        print('  mov %esp, %ebp')
+        self.out.print('  push %ebp')
+        self.out.print('  mov %esp, %ebp')
 
         # When running on 64-bit operating systems, we need to ensure
         # that the system call arguments are padded to 64 bits words, so
@@ -415,15 +399,17 @@ class AsmVdsoI686On64bitGenerator(AsmVdsoGenerator):
             if member.type.layout.size[0] == member.type.layout.size[1]:
                 # Argument whose size doesn't differ between systems.
                 for i in range(0, howmany(member.type.layout.size[0], 4)):
-                    print('  mov {}(%ebp), %ecx'.format(offset_in + i * 4))
-                    print('  mov %ecx, {}(%ebp)'.format(offset_out + i * 4))
+                    self.out.print('  mov {}(%ebp), %ecx'.format(offset_in +
+                                                                 i * 4))
+                    self.out.print('  mov %ecx, {}(%ebp)'.format(offset_out +
+                                                                 i * 4))
             else:
                 # Pointer or size_t. Zero-extend it to 64 bits.
                 assert member.type.layout.size[0] == 4
                 assert member.type.layout.size[1] == 8
-                print('  mov {}(%ebp), %ecx'.format(offset_in))
-                print('  mov %ecx, {}(%ebp)'.format(offset_out))
-                print('  movl $0, {}(%ebp)'.format(offset_out + 4))
+                self.out.print('  mov {}(%ebp), %ecx'.format(offset_in))
+                self.out.print('  mov %ecx, {}(%ebp)'.format(offset_out))
+                self.out.print('  movl $0, {}(%ebp)'.format(offset_out + 4))
             offset_in += roundup(member.type.layout.size[0], 4)
             offset_out += roundup(member.type.layout.size[1], 8)
         assert offset_in == 8 + sum(
@@ -431,15 +417,15 @@ class AsmVdsoI686On64bitGenerator(AsmVdsoGenerator):
         assert offset_out <= 0
 
         # Invoke system call, setting %ecx to the padded buffer.
-        print('  mov ${}, %eax'.format(number))
-        print('  mov %ebp, %ecx')
-        print('  sub ${}, %ecx'.format(slots_stack * 8))
-        print('  int $0x80')
+        self.out.print('  mov ${}, %eax'.format(number))
+        self.out.print('  mov %ebp, %ecx')
+        self.out.print('  sub ${}, %ecx'.format(slots_stack * 8))
+        self.out.print('  int $0x80')
 
         if not noreturn:
             if args_output:
-                print('  test %eax, %eax')
-                print('  jnz 1f')
+                self.out.print('  test %eax, %eax')
+                self.out.print('  jnz 1f')
 
                 # Extract arguments from the padded buffer.
                 offset_in = -8 * slots_stack
@@ -450,17 +436,18 @@ class AsmVdsoI686On64bitGenerator(AsmVdsoGenerator):
                     assert (size == member.type.layout.size[1]
                             or (size == 4 and member.type.layout.size[1] == 8))
                     assert size % 4 == 0
-                    print('  mov {}(%ebp), %ecx'.format(offset_out))
+                    self.out.print('  mov {}(%ebp), %ecx'.format(offset_out))
                     for i in range(0, howmany(size, 4)):
-                        print('  mov {}(%ebp), %edx'.format(offset_in + i * 4))
-                        print('  mov %edx, {}(%ecx)'.format(i * 4))
+                        self.out.print(
+                            '  mov {}(%ebp), %edx'.format(offset_in + i * 4))
+                        self.out.print('  mov %edx, {}(%ecx)'.format(i * 4))
                     offset_in += roundup(member.type.layout.size[1], 8)
                     offset_out += 4
 
-                print('1:')
+                self.out.print('1:')
 
-            print('  pop %ebp')
-            print('  ret')
+            self.out.print('  pop %ebp')
+            self.out.print('  ret')
 
 
 class AsmVdsoX86_64Generator(AsmVdsoCommonGenerator):
@@ -481,47 +468,38 @@ class AsmVdsoX86_64Generator(AsmVdsoCommonGenerator):
     def register_count(member):
         return howmany(member.type.layout.size[1], 8)
 
-    @staticmethod
-    def print_remap_register(reg_old, reg_new):
-        print('  mov %r{}, %r{}'.format(reg_old, reg_new))
+    def print_remap_register(self, reg_old, reg_new):
+        self.out.print('  mov %r{}, %r{}'.format(reg_old, reg_new))
 
-    @staticmethod
-    def print_push_addresses(regs):
+    def print_push_addresses(self, regs):
         for reg in regs:
-            print('  push %r{}'.format(reg))
+            self.out.print('  push %r{}'.format(reg))
 
-    @staticmethod
-    def print_syscall(number):
-        print('  mov ${}, %eax'.format(number))
-        print('  syscall')
+    def print_syscall(self, number):
+        self.out.print('  mov ${}, %eax'.format(number))
+        self.out.print('  syscall')
 
-    @staticmethod
-    def print_pop_addresses(regs):
+    def print_pop_addresses(self, regs):
         for reg in reversed(regs):
-            print('  pop %r{}'.format(reg))
+            self.out.print('  pop %r{}'.format(reg))
 
-    @staticmethod
-    def print_jump_syscall_failed(label):
-        print('  jc ' + label)
+    def print_jump_syscall_failed(self, label):
+        self.out.print('  jc ' + label)
 
-    @staticmethod
-    def print_load_address_from_stack(slot, reg):
-        print('  mov {}(%rsp), %r{}'.format(slot * 8 + 8, reg))
+    def print_load_address_from_stack(self, slot, reg):
+        self.out.print('  mov {}(%rsp), %r{}'.format(slot * 8 + 8, reg))
 
-    @staticmethod
-    def print_store_output(member, reg_from, reg_to, index):
+    def print_store_output(self, member, reg_from, reg_to, index):
         assert index == 0
         size = member.type.layout.size[1]
-        print('  mov {}{}, (%r{})'.format({
+        self.out.print('  mov {}{}, (%r{})'.format({
             4: '%e',
             8: '%r'
         }[size], reg_from, reg_to))
 
-    @staticmethod
-    def print_retval_success():
-        print('  xor %eax, %eax')
-        print('1:')
+    def print_retval_success(self):
+        self.out.print('  xor %eax, %eax')
+        self.out.print('1:')
 
-    @staticmethod
-    def print_return():
-        print('  ret')
+    def print_return(self):
+        self.out.print('  ret')
@@ -5,6 +5,57 @@
 from .abi import *
 from .generator import *
 
+# The offsets of the members of structs, which are the same for all headers.
+_member_offsets = ModelCache()
+
+
+# Returns the names and offsets of all members of a struct, including those
+# nested in variants. These are only computed once per struct.
+def member_offsets(type):
+    return _member_offsets.get(
+        type, None, lambda: list(
+            _flatten_offsets(type.raw_members, '', (0, ) * len(DATA_MODELS))))
+
+
+def _flatten_offsets(members, prefix, offset):
+    for m in members:
+        if isinstance(m, VariantMember):
+            mprefix = prefix
+            if m.name is not None:
+                mprefix += m.name + '.'
+            yield from _flatten_offsets(m.type.members, mprefix, offset)
+        elif m.offset is not None:
+            moffset = tuple(o + mo for o, mo in zip(offset, m.offset))
+            if isinstance(m, VariantStructMember):
+                yield from _flatten_offsets(m.members, prefix, moffset)
+            else:
+                yield prefix + m.name, moffset
+
+
+# The values of integer-like types as C literals, which are the same for all
+# headers.
+_formatted_values = ModelCache()
+
+
+# Returns the values of an integer-like type formatted as C literals, padded
+# to the same width. These are only computed once per type.
+def formatted_values(type):
+    return _formatted_values.get(type, None, lambda: _format_values(type))
+
+
+def _format_values(type):
+    if isinstance(type, FlagsType) or isinstance(type, OpaqueType):
+        if len(type.values) == 1 and type.values[0].value == 0:
+            val_format = 'd'
+        elif type.int_type.name[0] == 'i':  # Signed
+            val_format = 'd'
+        else:
+            val_format = '#0{}x'.format(type.layout.size[0] * 2 + 2)
+    else:
+        val_width = max(len(str(v.value)) for v in type.values)
+        val_format = '{}d'.format(val_width)
+    return [format(v.value, val_format) for v in type.values]
+
 
 class CGenerator(Generator):
     def __init__(self,
@@ -12,6 +63,7 @@ class CGenerator(Generator):
                  header_guard=None,
                  machine_dep=None,
                  md_type=None,
+                 data_model=None,
                  preamble='',
                  postamble=''):
         super().__init__(comment_prefix='// ')
@@ -19,31 +71,32 @@ class CGenerator(Generator):
         self.header_guard = header_guard
         self.machine_dep = machine_dep
         self.md_type = md_type
+        self.data_model = data_model
         self.preamble = preamble
         self.postamble = postamble
 
     def generate_head(self, abi):
         super().generate_head(abi)
         if self.header_guard is not None:
-            print('#ifndef {}'.format(self.header_guard))
-            print('#define {}'.format(self.header_guard))
-            print()
+            self.out.print('#ifndef {}'.format(self.header_guard))
+            self.out.print('#define {}'.format(self.header_guard))
+            self.out.print()
         if self.preamble != '':
-            print(self.preamble)
-        print('#ifdef __cplusplus')
-        print('extern "C" {')
-        print('#endif')
-        print()
+            self.out.print(self.preamble)
+        self.out.print('#ifdef __cplusplus')
+        self.out.print('extern "C" {')
+        self.out.print('#endif')
+        self.out.print()
 
     def generate_foot(self, abi):
-        print('#ifdef __cplusplus')
-        print('}  // extern "C"')
-        print('#endif')
-        print()
+        self.out.print('#ifdef __cplusplus')
+        self.out.print('}  // extern "C"')
+        self.out.print('#endif')
+        self.out.print()
         if self.postamble != '':
-            print(self.postamble)
+            self.out.print(self.postamble)
         if self.header_guard is not None:
-            print('#endif')
+            self.out.print('#endif')
         super().generate_foot(abi)
 
     def mi_type(self, mtype):
@@ -67,28 +120,29 @@ class CGenerator(Generator):
 
 
 class CSyscalldefsGenerator(CGenerator):
-    def generate_struct_members(self, abi, type, indent=''):
+    def generate_struct_members(self, abi, type):
         for m in type.raw_members:
             if isinstance(m, SimpleStructMember):
                 mtype = self.mi_type(m.type)
-                if mtype.layout.align[0] == mtype.layout.align[1]:
-                    alignas = '_Alignas({}) '.format(mtype.layout.align[0])
+                align = self.layout_values(mtype.layout.align)
+                if len(set(align)) == 1:
+                    alignas = '_Alignas({}) '.format(align[0])
                 else:
                     alignas = ''
-                print('{}{}{};'.format(indent, alignas,
-                                       self.naming.vardecl(mtype, m.name)))
+                self.out.print('{}{};'.format(
+                    alignas, self.naming.vardecl(mtype, m.name)))
             elif isinstance(m, VariantStructMember):
-                print('{}union {{'.format(indent))
-                for x in m.members:
-                    if x.name is None:
-                        self.generate_struct_members(abi, x.type,
-                                                     indent + '  ')
-                    else:
-                        print('{}  struct {{'.format(indent))
-                        self.generate_struct_members(abi, x.type,
-                                                     indent + '    ')
-                        print('{}  }} {};'.format(indent, x.name))
-                print('{}}};'.format(indent))
+                self.out.print('union {')
+                with self.out.indent():
+                    for x in m.members:
+                        if x.name is None:
+                            self.generate_struct_members(abi, x.type)
+                        else:
+                            self.out.print('struct {')
+                            with self.out.indent():
+                                self.generate_struct_members(abi, x.type)
+                            self.out.print('}} {};'.format(x.name))
+                self.out.print('};')
             else:
                 raise Exception('Unknown struct member: {}'.format(m))
 
@@ -99,39 +153,24 @@ class CSyscalldefsGenerator(CGenerator):
                 return
 
         if isinstance(type, IntLikeType):
-            print('typedef {};'.format(
+            self.out.print('typedef {};'.format(
                 self.naming.vardecl(type.int_type,
                                     self.naming.typename(type))))
             if len(type.values) > 0:
                 width = max(
                     len(self.naming.valname(type, v)) for v in type.values)
-                if (isinstance(type, FlagsType)
-                        or isinstance(type, OpaqueType)):
-                    if len(type.values) == 1 and type.values[0].value == 0:
-                        val_format = 'd'
-                    elif type.int_type.name[0] == 'i':  # Signed
-                        val_format = 'd'
-                    else:
-                        val_format = '#0{}x'.format(type.layout.size[0] * 2 +
-                                                    2)
-                else:
-                    val_width = max(len(str(v.value)) for v in type.values)
-                    val_format = '{}d'.format(val_width)
-
-                for v in type.values:
-                    print('#define {name:{width}} '
-                          '{val:{val_format}}'.format(name=self.naming.valname(
-                              type, v),
-                                                      width=width,
-                                                      val=v.value,
-                                                      val_format=val_format))
+                for v, val in zip(type.values, formatted_values(type)):
+                    self.out.print('#define {name:{width}} {val}'.format(
+                        name=self.naming.valname(type, v),
+                        width=width,
+                        val=val))
 
         elif isinstance(type, FunctionType):
             parameters = []
             for p in type.parameters.raw_members:
                 parameters.append(
                     self.naming.vardecl(self.mi_type(p.type), p.name))
-            print('typedef {};'.format(
+            self.out.print('typedef {};'.format(
                 self.naming.vardecl(self.mi_type(type.return_type),
                                     '{}({})'.format(self.naming.typename(type),
                                                     ', '.join(parameters)),
@@ -140,39 +179,20 @@ class CSyscalldefsGenerator(CGenerator):
         elif isinstance(type, StructType):
             typename = self.naming.typename(type)
 
-            print('typedef struct {')
-            self.generate_struct_members(abi, type, '  ')
-            print('}} {};'.format(typename))
+            self.out.print('typedef struct {')
+            with self.out.indent():
+                self.generate_struct_members(abi, type)
+            self.out.print('}} {};'.format(typename))
 
-            self.generate_offset_asserts(typename, type.raw_members)
+            for name, offset in member_offsets(type):
+                self.generate_offset_assert(typename, name, offset)
             self.generate_size_assert(typename, type.layout.size)
             self.generate_align_assert(typename, type.layout.align)
 
         else:
             raise Exception('Unknown class of type: {}'.format(type))
 
-        print()
-
-    def generate_offset_asserts(self,
-                                type_name,
-                                members,
-                                prefix='',
-                                offset=(0, 0)):
-        for m in members:
-            if isinstance(m, VariantMember):
-                mprefix = prefix
-                if m.name is not None:
-                    mprefix += m.name + '.'
-                self.generate_offset_asserts(type_name, m.type.members,
-                                             mprefix, offset)
-            elif m.offset is not None:
-                moffset = (offset[0] + m.offset[0], offset[1] + m.offset[1])
-                if isinstance(m, VariantStructMember):
-                    self.generate_offset_asserts(type_name, m.members, prefix,
-                                                 moffset)
-                else:
-                    self.generate_offset_assert(type_name, prefix + m.name,
-                                                moffset)
+        self.out.print()
 
     def generate_offset_assert(self, type_name, member_name, offset):
         self.generate_layout_assert(
@@ -184,69 +204,82 @@ class CSyscalldefsGenerator(CGenerator):
     def generate_align_assert(self, type_name, align):
         self.generate_layout_assert('_Alignof({})'.format(type_name), align)
 
+    # Returns the values of a size, alignment or offset that the types in
+    # this header need to have. Headers generated for a specific data model
+    # only use its value. Other headers use the values of ILP32 and LP64.
+    def layout_values(self, value):
+        if self.data_model is not None:
+            return (value[DATA_MODELS.index(self.data_model)], )
+        return base_values(value)
+
     def generate_layout_assert(self, expression, value):
         static_assert = '_Static_assert({}, "Incorrect layout");'
-        if value[0] == value[1] or (self.md_type is not None
-                                    and self.md_type.layout.size in ((4, 4),
-                                                                     (8, 8))):
-            v = value[1]
-            if self.md_type is not None and self.md_type.layout.size == (4, 4):
-                v = value[0]
-            print(static_assert.format('{} == {}'.format(expression, v)))
+        # Headers for a specific data model only need to check its value.
+        # This is the first data model with the size of md_type, unless
+        # another data model is provided explicitly. Other headers check the
+        # values of ILP32 and LP64, distinguished by the size of pointers.
+        md_index = None
+        if self.data_model is not None:
+            md_index = DATA_MODELS.index(self.data_model)
+        elif self.md_type is not None and not self.md_type.layout.machine_dep:
+            md_index = data_model_index(self.md_type.layout.size[0])
+        if md_index is not None:
+            self.out.print(
+                static_assert.format('{} == {}'.format(expression,
+                                                       value[md_index])))
+        elif len(set(base_values(value))) == 1:
+            self.out.print(
+                static_assert.format('{} == {}'.format(expression, value[0])))
         else:
             voidptr = self.naming.typename(PointerType())
-            print(
-                static_assert.format('sizeof({}) != 4 || {} == {}'.format(
-                    voidptr, expression, value[0])))
-            print(
-                static_assert.format('sizeof({}) != 8 || {} == {}'.format(
-                    voidptr, expression, value[1])))
+            for pointer_size in sorted({m.pointer_size for m in DATA_MODELS}):
+                self.out.print(
+                    static_assert.format('sizeof({}) != {} || {} == {}'.format(
+                        voidptr, pointer_size, expression,
+                        value[data_model_index(pointer_size)])))
 
     def generate_syscalls(self, abi, syscalls):
         pass
 
 
 class CSyscallsInfoGenerator(CGenerator):
-    def print_with_line_continuation(self, text):
-        lines = str.splitlines(text)
-        width = max(len(line) for line in lines)
-        for line in lines[:-1]:
-            print('{}{} \\'.format(line, ' ' * (width - len(line))))
-        print(lines[-1])
-
     def generate_syscalls(self, abi, syscalls):
         prefix = self.naming.prefix.upper()
-        self.print_with_line_continuation(
-            '#define {}SYSCALL_NAMES(SYSCALL)\n'.format(prefix) +
-            '\n'.join('  SYSCALL({})'.format(s) for s in sorted(abi.syscalls)))
-        print()
-        for s in sorted(abi.syscalls):
-            params = self.syscall_params(abi.syscalls[s])
-            self.print_with_line_continuation(
-                '#define {}SYSCALL_PARAMETERS_{}\n'.format(prefix, s) +
-                ',\n'.join('  {}'.format(p) for p in params))
-            print()
-        for s in sorted(abi.syscalls):
-            syscall = abi.syscalls[s]
+        self.out.print_with_line_continuation(
+            ['#define {}SYSCALL_NAMES(SYSCALL)'.format(prefix)] +
+            ['  SYSCALL({})'.format(s.name) for s in abi.syscalls_by_number()])
+        self.out.print()
+        for syscall in abi.syscalls_by_number():
+            params = self.syscall_params(syscall)
+            define = '#define {}SYSCALL_PARAMETERS_{}'.format(
+                prefix, syscall.name)
+            self.out.print_with_line_continuation(
+                [define] + ['  {},'.format(p) for p in params[:-1]] +
+                ['  {}'.format(p) for p in params[-1:]])
+            self.out.print()
+        for syscall in abi.syscalls_by_number():
             params = ([p.name for p in syscall.input.raw_members] +
                       [p.name for p in syscall.output.raw_members])
-            print('#define {}SYSCALL_PARAMETER_NAMES_{}'.format(prefix, s),
-                  end='')
+            self.out.print('#define {}SYSCALL_PARAMETER_NAMES_{}'.format(
+                prefix, syscall.name),
+                           end='')
             if params == []:
-                print()
+                self.out.print()
             else:
-                print(' \\\n  ' + ', '.join(params))
-            print()
-        for s in sorted(abi.syscalls):
-            print('#define {}SYSCALL_HAS_PARAMETERS_{}(yes, no) {}'.format(
-                self.naming.prefix.upper(), s, ('no' if self.syscall_params(
-                    abi.syscalls[s]) == [] else 'yes')))
-        print()
-        for s in sorted(abi.syscalls):
-            print('#define {}SYSCALL_RETURNS_{}(yes, no) {}'.format(
-                self.naming.prefix.upper(), s,
-                'no' if abi.syscalls[s].noreturn else 'yes'))
-        print()
+                self.out.print(' \\\n  ' + ', '.join(params))
+            self.out.print()
+        for syscall in abi.syscalls_by_number():
+            self.out.print(
+                '#define {}SYSCALL_HAS_PARAMETERS_{}(yes, no) {}'.format(
+                    self.naming.prefix.upper(), syscall.name,
+                    ('yes' if syscall.input.raw_members
+                     or syscall.output.raw_members else 'no')))
+        self.out.print()
+        for syscall in abi.syscalls_by_number():
+            self.out.print('#define {}SYSCALL_RETURNS_{}(yes, no) {}'.format(
+                self.naming.prefix.upper(), syscall.name,
+                'no' if syscall.noreturn else 'yes'))
+        self.out.print()
 
     def generate_types(self, abi, types):
         pass
@@ -263,24 +296,24 @@ class CSyscallsGenerator(CGenerator):
             return_type = VoidType()
         else:
             return_type = abi.types['errno']
-        print(self.naming.typename(return_type))
-        print(self.naming.syscallname(syscall))
-        print('(')
+        self.out.print(self.naming.typename(return_type))
+        self.out.print(self.naming.syscallname(syscall))
+        self.out.print('(')
         params = self.syscall_params(syscall)
         if params == []:
-            print('void')
+            self.out.print('void')
         else:
-            print(','.join(params))
-        print(')')
+            self.out.print(','.join(params))
+        self.out.print(')')
         self.generate_syscall_body(abi, syscall)
-        print()
+        self.out.print()
 
     def generate_syscall_keywords(self, syscall):
         if syscall.noreturn:
-            print('_Noreturn')
+            self.out.print('_Noreturn')
 
     def generate_syscall_body(self, abi, syscall):
-        print(';')
+        self.out.print(';')
 
     def generate_types(self, abi, types):
         pass
@@ -299,7 +332,7 @@ class CLinuxSyscallTableGenerator(CGenerator):
         # within a register, depending on the system's endianness.
         regalign = self.md_type.layout.align[0]
         regtype = self.naming.typename(self.md_type)
-        print(
+        self.out.print(
             '#ifdef __LITTLE_ENDIAN\n'
             '#define MEMBER(type, name) _Alignas({}) type name\n'
             '#else\n'
@@ -309,44 +342,44 @@ class CLinuxSyscallTableGenerator(CGenerator):
             '#endif\n'.format(regalign, regtype, regtype, regtype))
 
     def generate_syscall(self, abi, syscall):
-        print('static {} do_{}(const void *in, void *out) {{'.format(
+        self.out.print('static {} do_{}(const void *in, void *out) {{'.format(
             self.naming.typename(abi.types['errno']), syscall.name))
 
         # Map structures over the system call input and output registers.
         if syscall.input.raw_members:
-            print('const struct {')
+            self.out.print('const struct {')
             for p in syscall.input.raw_members:
-                print('MEMBER({}, {});'.format(self.naming.typename(p.type),
-                                               p.name))
-            print('} *vin = in;')
+                self.out.print('MEMBER({}, {});'.format(
+                    self.naming.typename(p.type), p.name))
+            self.out.print('} *vin = in;')
         if syscall.output.raw_members:
-            print('struct {')
+            self.out.print('struct {')
             for p in syscall.output.raw_members:
-                print('MEMBER({}, {});'.format(self.naming.typename(p.type),
-                                               p.name))
-            print('} *vout = out;')
+                self.out.print('MEMBER({}, {});'.format(
+                    self.naming.typename(p.type), p.name))
+            self.out.print('} *vout = out;')
 
         # Invoke the system call implementation function.
         if not syscall.noreturn:
-            print('return')
-        print(self.naming.syscallname(syscall))
+            self.out.print('return')
+        self.out.print(self.naming.syscallname(syscall))
         params = []
         for p in syscall.input.raw_members:
             params.append('vin->' + p.name)
         for p in syscall.output.raw_members:
             params.append('&vout->' + p.name)
-        print('(', ', '.join(params), ');')
+        self.out.print('(', ', '.join(params), ');')
         if syscall.noreturn:
-            print('return 0;')
-        print('}\n')
+            self.out.print('return 0;')
+        self.out.print('}\n')
 
     def generate_foot(self, abi):
         # Emit the actual system call table.
-        print('static {} (*syscalls[])(const void *, void *) = {{'.format(
-            self.naming.typename(abi.types['errno'])))
-        for idx in sorted(abi.syscalls):
-            syscall = abi.syscalls[idx]
-            print('do_{},'.format(syscall.name))
-        print('};')
+        self.out.print(
+            'static {} (*syscalls[])(const void *, void *) = {{'.format(
+                self.naming.typename(abi.types['errno'])))
+        for syscall in abi.syscalls_by_number():
+            self.out.print('do_{},'.format(syscall.name))
+        self.out.print('};')
 
         super().generate_foot(abi)
@@ -14,8 +14,13 @@ class CNaming:
         self.c11 = c11
         self.syscall_prefix = syscall_prefix
         self.pointer_prefix = pointer_prefix
+        self._typenames = ModelCache()
+        self._declarators = ModelCache()
 
     def typename(self, type):
+        return self._typenames.get(type, None, lambda: self._typename(type))
+
+    def _typename(self, type):
         if isinstance(type, VoidType):
             return 'void'
         elif isinstance(type, IntType):
@@ -51,7 +56,15 @@ class CNaming:
             prefix += 'sys_'
         return '{}{}'.format(prefix, syscall.name)
 
+    # Declarations are of the form '<before><name><after>'. The parts before
+    # and after the name only depend on the type, so they are computed once.
     def vardecl(self, type, name, array_need_parens=False):
+        before, after = self._declarators.get(
+            type, array_need_parens,
+            lambda: self._vardecl(type, '\0', array_need_parens).split('\0'))
+        return before + name + after
+
+    def _vardecl(self, type, name, array_need_parens):
         if isinstance(type, OutputPointerType):
             return self.vardecl(type.target_type,
                                 '*{}'.format(name),
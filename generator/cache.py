@@ -0,0 +1,74 @@
+# Copyright (c) 2016 Nuxi (https://nuxi.nl/) and contributors.
+#
+# SPDX-License-Identifier: BSD-2-Clause
+
+# Persistent cache that allows generate.py to skip targets whose inputs have
+# not changed since the last run.
+#
+# Every target is assigned a key, which is a hash of the ABI specification,
+# the sources of the generator package, the license headers in parts/ and the
+# arguments of the target itself. The cache stores this key, together with a
+# hash of every file written for the target. A target is only considered to
+# be up to date if its key is unchanged and its files are still intact.
+
+import glob
+import hashlib
+import json
+import os
+
+
+def _hash_file(file_name):
+    with open(file_name, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def hash_inputs(root, spec):
+    h = hashlib.sha256()
+    inputs = ([spec] +
+              sorted(glob.glob(os.path.join(root, 'generator', '*.py'))) +
+              sorted(glob.glob(os.path.join(root, 'parts', '*'))))
+    for file_name in inputs:
+        h.update(os.path.relpath(file_name, root).encode('UTF-8') + b'\0')
+        h.update(_hash_file(file_name).encode('UTF-8'))
+    return h.hexdigest()
+
+
+class TargetCache:
+    def __init__(self, file_name, root):
+        self.file_name = file_name
+        self.root = root
+        try:
+            with open(file_name) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def target_key(self, inputs, target):
+        h = hashlib.sha256(inputs.encode('UTF-8'))
+        h.update(target.describe().encode('UTF-8'))
+        return h.hexdigest()
+
+    def is_fresh(self, target, key):
+        entry = self.entries.get(target.path)
+        if entry is None or entry['key'] != key:
+            return False
+        for path, digest in entry['outputs'].items():
+            try:
+                if _hash_file(os.path.join(self.root, path)) != digest:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def update(self, target, key, outputs):
+        self.entries[target.path] = {
+            'key': key,
+            'outputs': {
+                path: hashlib.sha256(contents).hexdigest()
+                for path, contents in outputs
+            },
+        }
+
+    def save(self):
+        with open(self.file_name, 'w') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
@@ -2,8 +2,35 @@
 #
 # SPDX-License-Identifier: BSD-2-Clause
 
+import copy
+import os
+import re
+
 from .abi import *
 
+# The license header placed at the top of every output. It is only read
+# again when the file changes, as it may be edited while generate.py runs in
+# watch mode.
+_license = None
+_license_stat = None
+
+
+def _read_license():
+    global _license, _license_stat
+    file_name = os.path.join(os.path.dirname(__file__), '..', 'parts', 'head')
+    st = os.stat(file_name)
+    stat = (st.st_mtime_ns, st.st_size, st.st_ino)
+    if stat != _license_stat:
+        with open(file_name) as f:
+            _license = f.read().splitlines()
+        _license_stat = stat
+    return _license
+
+
+# References to objects in documentation, like [fd] or [subscription.type],
+# that are not already links.
+_REFERENCE = re.compile(r'\[([\w.]+)\](?!\()')
+
 
 class Generator:
     def __init__(self, comment_prefix='', comment_begin=None,
@@ -13,20 +40,29 @@ class Generator:
         self.comment_end = comment_end
 
     def generate_head(self, abi):
-        import os
-        license = os.path.dirname(__file__) + '/../parts/head'
         if self.comment_begin is not None:
-            print(self.comment_begin)
-        with open(license) as f:
-            for line in f:
-                print((self.comment_prefix + line).rstrip())
+            self.out.print(self.comment_begin)
+        for line in _read_license():
+            self.out.print((self.comment_prefix + line).rstrip())
         if self.comment_end is not None:
-            print(self.comment_end)
-        print()
+            self.out.print(self.comment_end)
+        self.out.print()
 
     def generate_foot(self, abi):
         pass
 
+    # Replaces the references in a line of documentation by the result of
+    # calling link with the path of the object referenced.
+    def link_references(self, abi, line, link):
+        def replace(match):
+            path = abi.resolve_path(match.group(1))
+            if path is None:
+                raise Exception('Unable to resolve link: {}'.format(
+                    match.group(1)))
+            return link(*path)
+
+        return _REFERENCE.sub(replace, line)
+
     def generate_type(self, abi, type):
         pass
 
@@ -34,33 +70,81 @@ class Generator:
         pass
 
     def generate_types(self, abi, types):
-        first_pass = True
-        generate_now = [types[name] for name in sorted(types)]
-        generate_later = []
-        generated = set()
-
-        while generate_now != []:
-            for type in generate_now:
-
-                if (not (getattr(type, 'dependencies', set()) <= generated)
-                        or (first_pass and not isinstance(type, IntLikeType))):
-                    generate_later.append(type)
-                else:
-                    self.generate_type(abi, type)
-                    generated.add(type)
+        if types is abi.types:
+            ordered = abi.types_by_dependency()
+        else:
+            ordered = order_types(types)
+        for type in ordered:
+            self.generate_type(abi, type)
 
-            generate_now = generate_later
-            generate_later = []
-            first_pass = False
+    def generate_syscalls(self, abi, syscalls):
+        if syscalls is abi.syscalls:
+            ordered = abi.syscalls_by_number()
+        else:
+            ordered = [syscalls[name] for name in sorted(syscalls)]
+        for syscall in ordered:
+            self.generate_syscall(abi, syscall)
 
-        assert (generated == set(types.values()))
+    # Generates code for the ABI, writing it to a CodeWriter. Generation is
+    # performed on a copy of the generator that holds the writer, so that the
+    # same generator may be used to produce multiple outputs concurrently.
+    def generate_abi(self, abi, out):
+        self.with_output(out).generate(abi)
 
-    def generate_syscalls(self, abi, syscalls):
-        for syscall in sorted(syscalls):
-            self.generate_syscall(abi, syscalls[syscall])
+    def with_output(self, out):
+        generator = copy.copy(self)
+        generator.out = out
+        return generator
 
-    def generate_abi(self, abi):
+    def generate(self, abi):
         self.generate_head(abi)
         self.generate_types(abi, abi.types)
         self.generate_syscalls(abi, abi.syscalls)
         self.generate_foot(abi)
+
+
+# Generates code for the ABI using multiple generators, each writing to its
+# own CodeWriter, in a single traversal of the ABI. Every type and syscall is
+# passed to all generators before moving on to the next one. Generators that
+# replace generate() are run on their own, as are generators that replace
+# generate_types() or generate_syscalls() for that part of the traversal.
+def generate_abi_together(generators, abi, outs):
+    together = []
+    for generator, out in zip(generators, outs):
+        if _replaces(generator, 'generate'):
+            generator.generate_abi(abi, out)
+        else:
+            together.append(generator.with_output(out))
+
+    for generator in together:
+        generator.generate_head(abi)
+
+    per_type = []
+    for generator in together:
+        if _replaces(generator, 'generate_types'):
+            generator.generate_types(abi, abi.types)
+        else:
+            per_type.append(generator)
+    if per_type:
+        for type in abi.types_by_dependency():
+            for generator in per_type:
+                generator.generate_type(abi, type)
+
+    per_syscall = []
+    for generator in together:
+        if _replaces(generator, 'generate_syscalls'):
+            generator.generate_syscalls(abi, abi.syscalls)
+        else:
+            per_syscall.append(generator)
+    if per_syscall:
+        for syscall in abi.syscalls_by_number():
+            for generator in per_syscall:
+                generator.generate_syscall(abi, syscall)
+
+    for generator in together:
+        generator.generate_foot(abi)
+
+
+# Returns whether the class of a generator replaces a method of Generator.
+def _replaces(generator, method):
+    return getattr(type(generator), method) is not getattr(Generator, method)
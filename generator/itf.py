@@ -6,11 +6,10 @@
 # using indentation. Every non-empty line represents a node, with the
 # indentation determining the tree structure.
 #
-# Every node is parsed to a namedtuple with:
+# Every node has:
 #  - text: The original line without surrounding whitespace.
-#  - children: The array of child nodes.
-#
-# A file is parsed to an array of these nodes.
+#  - children: The child nodes.
+#  - location: The file name, line and column at which the text starts.
 #
 # Example:
 #
@@ -23,65 +22,192 @@
 #      1 2 3
 #        4 5 6
 #
-#  Result:
-#    [
-#      Node(text='foo', children=[
-#        Node(text='bar', children=[]),
-#        Node(text='baz', children=[])
-#      ]),
-#      Node(text='test', children=[]),
-#      Node(text='quux', children=[
-#        Node(text='1 2 3', children=[
-#          Node(text='4 5 6', children=[])
-#        ])
-#      ])
-#    ]
+#  Tree:
+#    ROOT
+#      foo
+#        bar
+#        baz
+#      test
+#      quux
+#        1 2 3
+#          4 5 6
+#
+# As specifications consist of many nodes, a file is parsed to a Tree that
+# stores its nodes in flat arrays, instead of as individual objects. Nodes
+# are numbered in pre-order, with node 0 being an artificial root node. For
+# every node, the arrays store the range of the source containing its text,
+# its line and column, and the number of the first node following all of
+# its descendants. The text of a node is only extracted from the source when
+# requested. The nodes are accessed through Cursor objects.
+
+import mmap
+from array import array
+
+
+class Tree:
+    def __init__(self, file_name, source):
+        self.file_name = file_name
+        self.source = source
+        self.starts = array('I', [0])
+        self.ends = array('I', [0])
+        self.lines = array('I', [0])
+        self.columns = array('I', [0])
+        self.subtree_ends = array('I', [0])
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text(self, index):
+        text = self.source[self.starts[index]:self.ends[index]]
+        if isinstance(text, bytes):
+            return text.decode('UTF-8')
+        return text
+
+    def location(self, index):
+        if index == 0:
+            return self.file_name
+        return '{}:{}:{}'.format(self.file_name, self.lines[index],
+                                 self.columns[index])
+
+    # Returns a cursor over the top-level nodes.
+    def root(self):
+        return Cursor(self, 0)
+
+
+# Cursor over the children of a node, through which they can be consumed in
+# order without modifying the tree. This allows a tree to be parsed more than
+# once. Iterating over a cursor yields cursors over the remaining children.
+class Cursor:
+    __slots__ = ('tree', 'index', '_next', '_end')
 
-from collections import namedtuple
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+        self._next = index + 1
+        self._end = tree.subtree_ends[index]
 
-Node = namedtuple('Node', ['text', 'children'])
+    @property
+    def text(self):
+        return self.tree.text(self.index)
 
+    @property
+    def location(self):
+        return self.tree.location(self.index)
 
+    def at_end(self):
+        return self._next >= self._end
+
+    # The number of children that have not been consumed yet.
+    def __len__(self):
+        count = 0
+        i = self._next
+        while i < self._end:
+            count += 1
+            i = self.tree.subtree_ends[i]
+        return count
+
+    def __iter__(self):
+        while self._next < self._end:
+            yield self.next()
+
+    # Returns the text of the next child without consuming it, or None if
+    # all children have been consumed.
+    def peek(self):
+        if self._next >= self._end:
+            return None
+        return self.tree.text(self._next)
+
+    def next(self):
+        cursor = Cursor(self.tree, self._next)
+        self._next = self.tree.subtree_ends[self._next]
+        return cursor
+
+    # Consumes the next child if its text matches, returning a cursor to it.
+    def accept(self, text):
+        if self.peek() == text:
+            return self.next()
+        return None
+
+
+# Reads ITF from a file by mapping it into memory. The text of the nodes is
+# extracted from the mapping on demand, so the file is never copied as a
+# whole.
 def read_itf(file_name):
+    with open(file_name, 'rb') as f:
+        try:
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            return parse_itf([], file_name)
+    return _parse_itf(iter(source.readline, b''), file_name, source)
+
+
+# Parses ITF from an iterable of lines, which may either be strings or
+# UTF-8 encoded bytes. The file name is only used to report locations.
+def parse_itf(lines, file_name='<string>'):
+    return _parse_itf(lines, file_name, None)
+
 
-    # The stack holds pairs of indentation and the array of nodes at that
-    # level.
-    stack = [('', [])]
+def _parse_itf(lines, file_name, source):
+    tree = Tree(file_name, source)
+    chunks = []
 
-    # Merge the deepest level of indentation into the children of the last node
-    # of the level above it.
-    def pop_stack():
-        children = stack.pop()[1]
-        deepest_nodes = stack[-1][1]
-        deepest_nodes[-1].children.extend(children)
+    # The indentation of every level of the tree, and the nodes of which
+    # the descendants are still being parsed. The indentation of the top
+    # level is set once the type of the lines is known.
+    indents = [None]
+    open_nodes = [0]
 
-    with open(file_name) as f:
+    def close_node():
+        tree.subtree_ends[open_nodes.pop()] = len(tree)
 
-        line_num = 0
+    line_num = 0
+    offset = 0
 
-        for line in f:
-            line_num += 1
+    for line in lines:
+        line_num += 1
+        line_offset = offset
+        offset += len(line)
+        if source is None:
+            chunks.append(line)
+        if indents[0] is None:
+            indents[0] = line[:0]
 
-            # Skip empty and comment lines.
-            if line.strip()[:1] in ('', '#'):
-                continue
+        # Skip empty and comment lines.
+        text = line.strip()
+        if text[:1] in ('', '#', b'', b'#'):
+            continue
 
-            indent = line[:-len(line.lstrip())]
-            previndent = stack[-1][0]
-            if len(indent) > len(previndent) and indent.startswith(previndent):
-                # We have to go deeper.
-                stack.append((indent, []))
-            else:
-                while indent != previndent:
-                    if not previndent.startswith(indent):
-                        raise Exception('%s:%d: Invalid indentation' %
-                                        (file_name, line_num))
-                    pop_stack()
-                    previndent = stack[-1][0]
+        indent = line[:len(line) - len(line.lstrip())]
+        previndent = indents[-1]
+        if len(indent) > len(previndent) and indent.startswith(previndent):
+            # We have to go deeper.
+            if len(open_nodes) == len(indents):
+                raise Exception('%s:%d: Invalid indentation' %
+                                (file_name, line_num))
+            indents.append(indent)
+        else:
+            while indent != previndent:
+                if not previndent.startswith(indent):
+                    raise Exception('%s:%d: Invalid indentation' %
+                                    (file_name, line_num))
+                indents.pop()
+                close_node()
+                previndent = indents[-1]
+            # Finish the previous node at this level.
+            if len(open_nodes) > len(indents):
+                close_node()
 
-            stack[-1][1].append(Node(line.strip(), []))
+        open_nodes.append(len(tree))
+        tree.starts.append(line_offset + len(indent))
+        tree.ends.append(line_offset + len(indent) + len(text))
+        tree.lines.append(line_num)
+        tree.columns.append(len(indent) + 1)
+        tree.subtree_ends.append(0)
 
-    while len(stack) > 1:
-        pop_stack()
+    while open_nodes:
+        close_node()
 
-    return stack[-1][1]
+    if source is None:
+        tree.source = chunks[0][:0].join(chunks) if chunks else ''
+    return tree
@@ -2,21 +2,76 @@
 #
 # SPDX-License-Identifier: BSD-2-Clause
 
+# Layouts are computed for all supported data models at once. Sizes,
+# alignments and offsets are stored as tuples containing a value for every
+# data model, in the order of DATA_MODELS.
+
+
+class DataModel:
+    __slots__ = ('name', 'pointer_size', 'scalar_align')
+
+    # Integers and pointers are aligned to their size, unless scalar_align
+    # provides a different alignment for their size.
+    def __init__(self, name, pointer_size, scalar_align=None):
+        self.name = name
+        self.pointer_size = pointer_size
+        self.scalar_align = scalar_align or {}
+
+    def __repr__(self):
+        return self.name
+
+    def align(self, size):
+        return self.scalar_align.get(size, size)
+
+
+ILP32 = DataModel('ILP32', 4)
+LP64 = DataModel('LP64', 8)
+# 32-bit systems that align 64-bit integers to 4 bytes, like i386.
+ILP32_ALIGN4 = DataModel('ILP32_ALIGN4', 4, {8: 4})
+# 64-bit systems that align 64-bit integers and pointers to 16 bytes.
+LP64_ALIGN16 = DataModel('LP64_ALIGN16', 8, {8: 16})
+
+# The data models for which layouts are computed. ILP32 and LP64 are listed
+# first, in that order, as backends that only distinguish between 32-bit and
+# 64-bit systems use their values. Whether a type is machine dependent is
+# also determined by these two alone, so that the other data models don't
+# affect the existing outputs. Targets that generate code for one of the
+# other data models name it explicitly. 32-bit processes running on 64-bit
+# kernels use ILP32 as well.
+DATA_MODELS = (ILP32, LP64, ILP32_ALIGN4, LP64_ALIGN16)
+
+
+# Returns the values of a size, alignment or offset for ILP32 and LP64.
+def base_values(value):
+    return value[:2]
+
 
 class Layout:
+    __slots__ = ('size', 'align', 'machine_dep')
+
     def __init__(self, size, align=None, machine_dep=None):
         if align is None:
             align = size
-        if not isinstance(size, tuple):
-            size = (size, size)
-        if not isinstance(align, tuple):
-            align = (align, align)
+        size = _per_model(size)
+        align = _per_model(align)
         self.size = size
         self.align = align
         if machine_dep is None:
-            machine_dep = size[0] != size[1] or align[0] != align[1]
+            machine_dep = (len(set(base_values(size))) > 1
+                           or len(set(base_values(align))) > 1)
         self.machine_dep = machine_dep
 
+    # Returns the layout of an integer or pointer type, given its size.
+    @staticmethod
+    def scalar(size):
+        size = _per_model(size)
+        return Layout(size,
+                      tuple(m.align(s) for m, s in zip(DATA_MODELS, size)))
+
+    @staticmethod
+    def pointer():
+        return Layout.scalar(tuple(m.pointer_size for m in DATA_MODELS))
+
     @staticmethod
     def struct(members):
         if members == []:
@@ -25,17 +80,14 @@ class Layout:
         if any(m.layout is None for m in members):
             return None
 
-        align = (max(m.layout.align[0] for m in members),
-                 max(m.layout.align[1] for m in members))
+        align = tuple(map(max, zip(*(m.layout.align for m in members))))
 
-        offset = (0, 0)
+        offset = (0, ) * len(DATA_MODELS)
         for m in members:
-            m.offset = (_align(offset[0], m.layout.align[0]),
-                        _align(offset[1], m.layout.align[1]))
-            offset = (m.offset[0] + m.layout.size[0],
-                      m.offset[1] + m.layout.size[1])
+            m.offset = tuple(map(_align, offset, m.layout.align))
+            offset = tuple(o + s for o, s in zip(m.offset, m.layout.size))
 
-        size = (_align(offset[0], align[0]), _align(offset[1], align[1]))
+        size = tuple(map(_align, offset, align))
 
         machine_dep = any(m.layout.machine_dep for m in members)
 
@@ -49,7 +101,7 @@ class Layout:
         if type.layout is None:
             return None
 
-        size = (type.layout.size[0] * count, type.layout.size[1] * count)
+        size = tuple(s * count for s in type.layout.size)
 
         return Layout(size, type.layout.align, type.layout.machine_dep)
 
@@ -61,19 +113,31 @@ class Layout:
         if any(m.layout is None for m in members):
             return None
 
-        size = (max(m.layout.size[0]
-                    for m in members), max(m.layout.size[1] for m in members))
+        size = tuple(map(max, zip(*(m.layout.size for m in members))))
 
-        align = (max(m.layout.align[0] for m in members),
-                 max(m.layout.align[1] for m in members))
+        align = tuple(map(max, zip(*(m.layout.align for m in members))))
 
         machine_dep = any(m.layout.machine_dep for m in members)
 
         return Layout(size, align, machine_dep)
 
     def fits_in(self, other_layout):
-        return (self.size[0] <= other_layout.size[0]
-                and self.size[1] <= other_layout.size[1])
+        return all(s <= o for s, o in zip(self.size, other_layout.size))
+
+
+# Returns the index of the first data model with a given pointer size.
+def data_model_index(pointer_size):
+    for i, m in enumerate(DATA_MODELS):
+        if m.pointer_size == pointer_size:
+            return i
+    return None
+
+
+def _per_model(value):
+    if isinstance(value, tuple):
+        assert len(value) == len(DATA_MODELS)
+        return value
+    return (value, ) * len(DATA_MODELS)
 
 
 def _align(size, align):
@@ -0,0 +1,317 @@
+# Copyright (c) 2016 Nuxi (https://nuxi.nl/) and contributors.
+#
+# SPDX-License-Identifier: BSD-2-Clause
+
+# Conversion of Markdown to HTML, used to generate the HTML versions of the
+# documentation without depending on an external tool.
+#
+# This is not a general purpose Markdown implementation. It only supports
+# the constructs emitted by MarkdownGenerator and the documentation strings
+# in cloudabi.txt: HTML comments, ATX headings, paragraphs, (nested) bullet
+# lists, code spans, links, strong emphasis, inline HTML and backslash
+# escapes. The output mimics that of Discount's markdown(1), which is the
+# tool that was previously used to render the documentation.
+
+import re
+
+_PLAIN = 0
+_PARA = 1
+
+
+class _Block:
+    def __init__(self, kind, lines=None, level=None, items=None):
+        self.kind = kind
+        self.lines = lines
+        self.level = level
+        self.items = items
+        self.align = _PLAIN
+
+
+def _dle(line):
+    return len(line) - len(line.lstrip(' '))
+
+
+def _is_blank(line):
+    return line.strip() == ''
+
+
+def _skip_empty(lines, i):
+    while i < len(lines) and _is_blank(lines[i]):
+        i += 1
+    return i
+
+
+def _is_header(line):
+    return line.startswith('#')
+
+
+def _is_hr(line):
+    stripped = line.replace(' ', '')
+    return (len(stripped) >= 3 and stripped[0] in '*-_'
+            and stripped == stripped[0] * len(stripped))
+
+
+def _is_code(line):
+    return _dle(line) >= 4
+
+
+# Returns the number of leading characters to strip from the lines of a list
+# item, or zero if the line does not start a bullet list item.
+def _is_list(line):
+    if _is_blank(line) or _is_header(line) or _is_hr(line):
+        return 0
+    dle = _dle(line)
+    if dle >= 4 or line[dle] not in '*-+':
+        return 0
+    rest = line[dle + 1:]
+    content = len(rest) - len(rest.lstrip(' '))
+    if content == 0 or content == len(rest):
+        return 0
+    return min(dle + 1 + content, 4)
+
+
+def _trim(line, clip):
+    return line[clip:] if clip < len(line) else ''
+
+
+# Extracts a single list item starting at index start. Returns the lines of
+# the item and the index of the first line after the item.
+def _list_item(lines, start, indent):
+    clip = indent
+    item = []
+    t = start
+    while True:
+        item.append(_trim(lines[t], clip))
+        if indent > 4:
+            indent = 4
+        q = _skip_empty(lines, t + 1)
+        if q == len(lines):
+            return item, q
+        if q != t + 1:
+            if _dle(lines[q]) < indent:
+                return item, t + 1
+            item.extend([''] * (q - t - 1))
+            indent = clip if clip else 2
+        if _dle(lines[q]) < indent and (_is_hr(lines[q])
+                                        or _is_list(lines[q])):
+            return item, t + 1
+        t = q
+
+
+def _list_block(lines, start, clip):
+    items = []
+    para = False
+    i = start
+    while True:
+        item, end = _list_item(lines, i, clip)
+        blocks = _compile(item, False)
+        if para and blocks:
+            blocks[0].align = _PARA
+        items.append(blocks)
+
+        q = _skip_empty(lines, end)
+        if q == len(lines):
+            return _Block('ul', items=items), end
+        clip = _is_list(lines[q])
+        if not clip:
+            return _Block('ul', items=items), end
+        para = q != end
+        if para and blocks:
+            blocks[0].align = _PARA
+        i = q
+
+
+def _text_block(lines, start, toplevel):
+    i = start
+    while True:
+        i += 1
+        if (i == len(lines) or _is_blank(lines[i]) or _is_header(lines[i])
+                or _is_hr(lines[i]) or (not toplevel and _is_list(lines[i]))):
+            return _Block('markup', lines=lines[start:i]), i
+
+
+def _compile(lines, toplevel):
+    blocks = []
+    para = toplevel
+    i = _skip_empty(lines, 0)
+    if i < len(lines):
+        para = i > 0
+
+    while i < len(lines):
+        line = lines[i]
+        if toplevel and line.startswith('<!--'):
+            end = i
+            while '-->' not in lines[end]:
+                end += 1
+                if end == len(lines):
+                    raise Exception('Unterminated HTML comment')
+            block = _Block('html', lines=lines[i:end + 1])
+            i = end + 1
+        elif _is_code(line):
+            end = i
+            while end < len(lines) and (_is_code(lines[end])
+                                        or _is_blank(lines[end])):
+                end += 1
+            while _is_blank(lines[end - 1]):
+                end -= 1
+            block = _Block('code', lines=[_trim(l, 4) for l in lines[i:end]])
+            i = end
+        elif _is_hr(line):
+            block = _Block('hr')
+            i += 1
+        elif _is_list(line):
+            block, i = _list_block(lines, i, _is_list(line))
+        elif _is_header(line):
+            level = len(line) - len(line.lstrip('#'))
+            block = _Block('header',
+                           lines=[line[level:].strip().rstrip('#').rstrip()],
+                           level=level)
+            i += 1
+        else:
+            block, i = _text_block(lines, i, toplevel)
+
+        if para or toplevel:
+            block.align = _PARA
+        blocks.append(block)
+
+        para = toplevel or len(blocks) > 1
+        j = _skip_empty(lines, i)
+        if j < len(lines):
+            para = j > i
+        i = j
+        if para:
+            block.align = _PARA
+
+    return blocks
+
+
+def _escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+_ESCAPABLE = '\\`*_{}[]()#+-.!<>'
+_TAG = re.compile(r'</?[A-Za-z][^<>]*>')
+_ENTITY = re.compile(r'&(#?[A-Za-z0-9]+);')
+
+
+def _unescape(text):
+    return re.sub(r'\\([{}])'.format(re.escape(_ESCAPABLE)), r'\1', text)
+
+
+# Returns the index of the bracket closing the one at index start, skipping
+# over code spans and escaped characters.
+def _match_bracket(text, start):
+    depth = 0
+    i = start
+    while i < len(text):
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        elif c == '`':
+            end = text.find('`', i + 1)
+            if end < 0:
+                return -1
+            i = end
+        elif c == '[':
+            depth += 1
+        elif c == ']':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return -1
+
+
+def _inline(text):
+    out = []
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c == '\\' and i + 1 < len(text) and text[i + 1] in _ESCAPABLE:
+            out.append(_escape(text[i + 1]))
+            i += 2
+        elif c == '`':
+            ticks = len(text[i:]) - len(text[i:].lstrip('`'))
+            end = text.find('`' * ticks, i + ticks)
+            if end < 0:
+                out.append(text[i:i + ticks])
+                i += ticks
+            else:
+                out.append('<code>{}</code>'.format(
+                    _escape(text[i + ticks:end].strip())))
+                i = end + ticks
+        elif c == '[':
+            close = _match_bracket(text, i)
+            end = text.find(')', close + 2) if close > 0 else -1
+            if end > 0 and text[close + 1:close + 2] == '(':
+                out.append('<a href="{}">{}</a>'.format(
+                    _unescape(text[close + 2:end].strip()),
+                    _inline(text[i + 1:close])))
+                i = end + 1
+            else:
+                out.append(c)
+                i += 1
+        elif text.startswith('**', i):
+            end = text.find('**', i + 2)
+            if end > i + 2:
+                out.append('<strong>{}</strong>'.format(
+                    _inline(text[i + 2:end])))
+                i = end + 2
+            else:
+                out.append('**')
+                i += 2
+        elif c == '<':
+            m = _TAG.match(text, i)
+            if m:
+                out.append(m.group(0))
+                i = m.end()
+            else:
+                out.append('&lt;')
+                i += 1
+        elif c == '&':
+            m = _ENTITY.match(text, i)
+            if m:
+                out.append(m.group(0))
+                i = m.end()
+            else:
+                out.append('&amp;')
+                i += 1
+        elif c == '>':
+            out.append('&gt;')
+            i += 1
+        elif c == '\'' and i > 0 and text[i - 1].isalnum():
+            out.append('&rsquo;')
+            i += 1
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out)
+
+
+def _display(block):
+    if block.kind == 'html':
+        return '\n'.join(block.lines) + '\n'
+    elif block.kind == 'code':
+        return '<pre><code>{}\n</code></pre>'.format(
+            _escape('\n'.join(block.lines)))
+    elif block.kind == 'hr':
+        return '<hr />'
+    elif block.kind == 'header':
+        return '<h{0}>{1}</h{0}>'.format(block.level, _inline(block.lines[0]))
+    elif block.kind == 'ul':
+        return '<ul>\n{}</ul>\n'.format(''.join(
+            '<li>{}</li>\n'.format(_htmlify(item)) for item in block.items))
+    else:
+        text = _inline('\n'.join(line.rstrip() for line in block.lines))
+        if block.align == _PARA:
+            return '<p>{}</p>'.format(text)
+        return text
+
+
+def _htmlify(blocks):
+    return '\n\n'.join(_display(block) for block in blocks)
+
+
+def markdown_to_html(text):
+    return _htmlify(_compile(text.splitlines(), True)) + '\n'
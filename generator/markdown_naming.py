@@ -2,7 +2,15 @@ from .abi import *
 
 
 class MarkdownNaming:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._links = ModelCache()
+
     def link(self, *path, code=True):
+        return self._links.get(path[0], (path[1:], code),
+                               lambda: self._link(path, code))
+
+    def _link(self, path, code):
         name = self.link_name(*path)
         target = self.link_target(*path)
         if code:
@@ -0,0 +1,82 @@
+# Copyright (c) 2016 Nuxi (https://nuxi.nl/) and contributors.
+#
+# SPDX-License-Identifier: BSD-2-Clause
+
+# Writing of generated files. Files are only replaced if their contents
+# actually change, so that their modification times are left alone and
+# build systems depending on them don't rebuild needlessly. Replacement
+# happens atomically, so that readers never observe a partially written file.
+
+import os
+
+
+def read_file(file_name):
+    try:
+        with open(file_name, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_if_changed(file_name, contents):
+    if read_file(file_name) == contents:
+        return False
+
+    import tempfile
+    try:
+        mode = os.stat(file_name).st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, temp_name = tempfile.mkstemp(dir=os.path.dirname(file_name) or '.',
+                                     prefix='.' + os.path.basename(file_name) +
+                                     '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contents)
+        os.chmod(temp_name, mode)
+        os.replace(temp_name, file_name)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+    return True
+
+
+# Returns the names of the files in the index of a Git repository that are
+# stored at or below the given paths.
+def list_staged_files(root, paths):
+    import subprocess
+    result = subprocess.run(['git', 'ls-files', '-z', '--'] + paths,
+                            stdout=subprocess.PIPE,
+                            cwd=root,
+                            check=True).stdout
+    return result.decode('UTF-8').split('\0')[:-1]
+
+
+# Reads the versions of files stored in the index of a Git repository.
+# Returns a dictionary of file contents, using None for files that are
+# not present in the index.
+def read_staged_files(root, paths):
+    import subprocess
+    result = subprocess.run(['git', 'cat-file', '--batch'],
+                            input=''.join(':{}\n'.format(path)
+                                          for path in paths).encode('UTF-8'),
+                            stdout=subprocess.PIPE,
+                            cwd=root,
+                            check=True).stdout
+
+    files = {}
+    offset = 0
+    for path in paths:
+        end = result.index(b'\n', offset)
+        header = result[offset:end].split()
+        offset = end + 1
+        if header[-1] == b'missing':
+            files[path] = None
+        else:
+            size = int(header[2])
+            files[path] = result[offset:offset + size]
+            offset += size + 1
+    return files
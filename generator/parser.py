@@ -2,7 +2,7 @@
 #
 # SPDX-License-Identifier: BSD-2-Clause
 
-from .itf import read_itf, Node
+from .itf import read_itf
 from .abi import *
 
 
@@ -10,12 +10,13 @@ class AbiParser:
     def parse_abi_file(self, file_name):
         return self.parse_abi(read_itf(file_name))
 
-    def parse_abi(self, nodes):
+    def parse_abi(self, tree):
         abi = Abi()
 
-        abi.doc = self.pop_documentation(Node(text='ROOT', children=nodes))
+        root = tree.root()
+        abi.doc = self.pop_documentation(root)
 
-        for node in nodes:
+        for node in root:
             decl = node.text.split()
 
             doc = self.pop_documentation(node)
@@ -23,59 +24,63 @@ class AbiParser:
             thing = None
 
             if decl[0] in int_like_types:
-                t = self.parse_int_like_type(abi, decl, node.children)
+                t = self.parse_int_like_type(abi, decl, node)
                 abi.types[t.name] = t
                 thing = t
 
             elif decl[0] == 'struct':
-                t = self.parse_struct(abi, decl, node.children)
+                t = self.parse_struct(abi, decl, node)
                 abi.types[t.name] = t
                 thing = t
 
             elif decl[0] == 'function':
-                t = self.parse_function(abi, decl, node.children)
+                t = self.parse_function(abi, decl, node)
                 abi.types[t.name] = t
                 thing = t
 
             elif decl[0] == 'syscall':
-                s = self.parse_syscall(abi, decl, node.children)
+                s = self.parse_syscall(abi, decl, node)
                 abi.syscalls[s.name] = s
                 thing = s
 
             else:
-                print('Invalid top level declaration: {}'.format(node.text))
+                raise self.__error(
+                    node,
+                    'Invalid top level declaration: {}'.format(node.text))
 
             thing.doc = doc
 
-        for type in abi.types.values():
-            type.used_by = {
-                t
-                for t in abi.types.values()
-                if type in getattr(t, 'dependencies', set())
-            }
-
-            type.used_by.update({
-                s
-                for s in abi.syscalls.values()
-                if type in getattr(s, 'dependencies', set())
-            })
-
+        self.compute_used_by(abi)
+        abi.index_symbols()
         return abi
 
+    # Builds the index of the types and syscalls depending on every type.
+    # For compatibility, the direct dependents of every type are also stored
+    # in its used_by attribute.
+    def compute_used_by(self, abi):
+        abi.dependents = DependencyIndex(
+            list(abi.types.values()) + list(abi.syscalls.values()))
+        for type in abi.types.values():
+            type.used_by = abi.dependents.direct(type)
+
     def parse_int_like_type(self, abi, decl, children):
         if len(decl) != 3:
-            raise Exception('Invalid {} declaration: {}'.format(
-                decl[0], ' '.join(decl)))
+            raise self.__error(
+                children,
+                'Invalid {} declaration: {}'.format(decl[0], ' '.join(decl)))
 
         name = decl[2]
         if name in abi.types:
-            raise Exception('Duplicate definition of {}'.format(name))
+            raise self.__error(children,
+                               'Duplicate definition of {}'.format(name))
 
         int_type = decl[1]
         if int_type not in int_types:
-            raise Exception('Invalid int type: {}'.format(int_type))
+            raise self.__error(children,
+                               'Invalid int type: {}'.format(int_type))
 
         values = []
+        names = set()
         attr = {}
 
         for node in children:
@@ -85,24 +90,30 @@ class AbiParser:
                 attr['cprefix'] = (value_decl[1]
                                    if len(value_decl) == 2 else '')
             elif len(value_decl) == 2:
+                if value_decl[1] in names:
+                    raise self.__error(
+                        node, 'Duplicate value {}'.format(value_decl[1]))
+                names.add(value_decl[1])
                 v = SpecialValue(value_decl[1], int(value_decl[0], 0))
                 v.doc = self.pop_documentation(node)
                 self.__expect_no_children(node)
                 values.append(v)
             else:
-                raise Exception('Invalid value: {}'.format(child.text))
+                raise self.__error(node, 'Invalid value: {}'.format(node.text))
 
         return int_like_types[decl[0]](name, int_types[int_type], values,
                                        **attr)
 
     def parse_struct(self, abi, decl, children):
         if len(decl) != 2:
-            raise Exception('Invalid struct declaration: {}'.format(
-                decl, ' '.join(decl)))
+            raise self.__error(
+                children,
+                'Invalid struct declaration: {}'.format(' '.join(decl)))
 
         name = decl[1]
         if name in abi.types:
-            raise Exception('Duplicate definition of {}'.format(name))
+            raise self.__error(children,
+                               'Duplicate definition of {}'.format(name))
 
         members = self.parse_struct_members(abi, children)
 
@@ -126,20 +137,22 @@ class AbiParser:
                             tag_member = m
                             break
                         else:
-                            raise Exception(
-                                'Variant tag ({}) must be an enum or '
+                            raise self.__error(
+                                node, 'Variant tag ({}) must be an enum or '
                                 'an alias type.'.format(m.name))
                 if tag_member is None:
-                    raise Exception('No such member to use as variant tag: '
-                                    '{}.'.format(tag_member_name))
-                mem = self.parse_variant(abi, tag_member, node.children)
+                    raise self.__error(
+                        node, 'No such member to use as variant tag: '
+                        '{}.'.format(tag_member_name))
+                mem = self.parse_variant(abi, tag_member, node)
 
             elif mem_decl[0] in {'range', 'crange'}:
                 doc = self.pop_documentation(node)
                 self.__expect_no_children(node)
                 if len(mem_decl) < 3:
-                    raise Exception('Invalid range: {}'.format(node.text))
-                mem_type = self.parse_type(abi, mem_decl[1:-1])
+                    raise self.__error(node,
+                                       'Invalid range: {}'.format(node.text))
+                mem_type = self.parse_type(abi, mem_decl[1:-1], node)
                 mem_name = mem_decl[-1]
                 mem = RangeStructMember(mem_name, mem_decl[0] == 'crange',
                                         mem_type)
@@ -148,18 +161,19 @@ class AbiParser:
 
             else:
                 mem_name = mem_decl[-1]
-                mem_type = self.parse_type(abi, mem_decl[:-1])
+                mem_type = self.parse_type(abi, mem_decl[:-1], node)
                 mem_vals = []
                 if isinstance(mem_type, IntLikeType):
                     doc = self.pop_documentation(node, optional=True)
-                    for n in node.children:
+                    for n in node:
                         vname = n.text
-                        val = [v for v in mem_type.values if vname == v.name]
-                        if len(val) != 1:
-                            raise Exception(
+                        val = mem_type.values_by_name.get(vname)
+                        if val is None:
+                            raise self.__error(
+                                n,
                                 'Struct member type {} has no value {}'.format(
                                     mem_type.name, vname))
-                        v = SpecialValue(val[0].name, val[0].value)
+                        v = SpecialValue(val.name, val.value)
                         v.doc = self.pop_documentation(n)
                         self.__expect_no_children(n)
                         mem_vals.append(v)
@@ -175,65 +189,69 @@ class AbiParser:
 
     def parse_function(self, abi, decl, children):
         if len(decl) != 2:
-            raise Exception('Invalid function declaration: {}'.format(
-                ' '.join(decl)))
+            raise self.__error(
+                children,
+                'Invalid function declaration: {}'.format(' '.join(decl)))
 
         name = decl[1]
         if name in abi.types:
-            raise Exception('Duplicate definition of {}'.format(name))
+            raise self.__error(children,
+                               'Duplicate definition of {}'.format(name))
 
         parameters = StructType(None, [])
         return_type = VoidType()
-
-        if len(children) > 0 and children[0].text == 'in':
-            param_spec = children.pop(0)
-            parameters = StructType(
-                None, self.parse_struct_members(abi, param_spec.children))
-
-        if len(children) > 0 and children[0].text == 'out':
-            out_spec = children.pop(0)
-            doc = self.pop_documentation(out_spec)
-            if len(out_spec.children) != 1:
-                raise Exception('Expected a single return type in '
-                                '`out\' section of function.')
-            self.__expect_no_children(out_spec.children[0])
-            return_type = (self.parse_type(abi,
-                                           out_spec.children[0].text.split()))
-            return_type.doc = doc
-
-        return FunctionType(name, parameters, return_type)
+        return_doc = ''
+
+        param_spec = children.accept('in')
+        if param_spec is not None:
+            parameters = StructType(None,
+                                    self.parse_struct_members(abi, param_spec))
+
+        out_spec = children.accept('out')
+        if out_spec is not None:
+            return_doc = self.pop_documentation(out_spec)
+            if len(out_spec) != 1:
+                raise self.__error(
+                    out_spec, 'Expected a single return type in '
+                    '`out\' section of function.')
+            return_spec = out_spec.next()
+            self.__expect_no_children(return_spec)
+            return_type = self.parse_type(abi, return_spec.text.split(),
+                                          return_spec)
+
+        return FunctionType(name, parameters, return_type, return_doc)
 
     def parse_syscall(self, abi, decl, children):
         if len(decl) != 2:
-            raise Exception('Invalid declaration: {}'.format(' '.join(decl)))
+            raise self.__error(
+                children, 'Invalid declaration: {}'.format(' '.join(decl)))
 
         name = decl[1]
         if name in abi.syscalls:
-            raise Exception('Duplicate syscall name: {}'.format(name))
+            raise self.__error(children,
+                               'Duplicate syscall name: {}'.format(name))
 
         input = StructType('', [])
         output = StructType('', [])
         attr = {}
 
-        if len(children) > 0 and children[0].text == 'in':
-            in_spec = children.pop(0)
-            input = StructType(
-                None, self.parse_struct_members(abi, in_spec.children))
-
-        if len(children) > 0:
-            if children[0].text == 'out':
-                out_spec = children.pop(0)
-                output = StructType(
-                    None, self.parse_struct_members(abi, out_spec.children))
+        in_spec = children.accept('in')
+        if in_spec is not None:
+            input = StructType(None, self.parse_struct_members(abi, in_spec))
 
-            elif children[0].text == 'noreturn':
-                noreturn_spec = children.pop(0)
+        out_spec = children.accept('out')
+        if out_spec is not None:
+            output = StructType(None, self.parse_struct_members(abi, out_spec))
+        else:
+            noreturn_spec = children.accept('noreturn')
+            if noreturn_spec is not None:
                 self.__expect_no_children(noreturn_spec)
                 attr['noreturn'] = True
 
-        if children != []:
-            raise Exception('Invalid node under syscall: {}'.format(
-                children[0].text))
+        if not children.at_end():
+            node = children.next()
+            raise self.__error(
+                node, 'Invalid node under syscall: {}'.format(node.text))
 
         syscall = Syscall(name, input, output, **attr)
 
@@ -247,30 +265,30 @@ class AbiParser:
             tag_value_names = node.text.split()
             tag_values = []
             for vname in tag_value_names:
-                val = [v for v in tag_type.values if vname == v.name]
-                if len(val) != 1:
-                    raise Exception(
-                        'Variant tag type {} has no value {}'.format(
+                val = tag_type.values_by_name.get(vname)
+                if val is None:
+                    raise self.__error(
+                        node, 'Variant tag type {} has no value {}'.format(
                             tag_type.name, vname))
-                tag_values.append(val[0])
-            if len(node.children) != 1:
-                raise Exception(
+                tag_values.append(val)
+            if len(node) != 1:
+                raise self.__error(
+                    node,
                     'Excepted a single member in variant member `{}\'.'.format(
                         node.text))
-            decl = node.children[0].text.split()
+            decl = node.peek().split()
             if len(decl) == 2 and decl[0] == 'struct':
                 name = decl[1]
-                spec = node.children[0]
+                spec = node.next()
             else:
                 name = None
                 spec = node
-            type = StructType(None,
-                              self.parse_struct_members(abi, spec.children))
+            type = StructType(None, self.parse_struct_members(abi, spec))
             members.append(VariantMember(name, tag_values, type))
 
         return VariantStructMember(tag_member, members)
 
-    def parse_type(self, abi, decl):
+    def parse_type(self, abi, decl, node):
         if decl == ['void']:
             return VoidType()
         elif len(decl) == 1:
@@ -278,36 +296,45 @@ class AbiParser:
                 return int_types[decl[0]]
             if decl[0] in abi.types:
                 return abi.types[decl[0]]
-            raise Exception('Unknown type {}'.format(' '.join(decl)))
+            raise self.__error(node, 'Unknown type {}'.format(' '.join(decl)))
         elif decl[:1] == ['array'] and len(decl) > 2:
-            return ArrayType(int(decl[1], 0), self.parse_type(abi, decl[2:]))
+            return ArrayType(int(decl[1], 0),
+                             self.parse_type(abi, decl[2:], node))
         elif decl[:1] == ['ptr']:
-            return PointerType(self.parse_type(abi, decl[1:]))
+            return PointerType(self.parse_type(abi, decl[1:], node))
         elif decl[:1] == ['cptr']:
-            return PointerType(self.parse_type(abi, decl[1:]), const=True)
+            return PointerType(self.parse_type(abi, decl[1:], node),
+                               const=True)
         elif decl[:1] == ['atomic']:
-            return AtomicType(self.parse_type(abi, decl[1:]))
+            return AtomicType(self.parse_type(abi, decl[1:], node))
         else:
-            raise Exception('Invalid type: {}'.format(' '.join(decl)))
+            raise self.__error(node, 'Invalid type: {}'.format(' '.join(decl)))
 
     def pop_documentation(self, node, optional=False):
         doc = ''
-        while len(
-                node.children) > 0 and (node.children[0].text.startswith('| ')
-                                        or node.children[0].text == '|'):
-            n = node.children.pop(0)
-            if n.children != []:
-                raise Exception(
-                    'Documentation nodes should not have children.')
+        while not node.at_end() and (node.peek().startswith('| ')
+                                     or node.peek() == '|'):
+            n = node.next()
+            if not n.at_end():
+                raise self.__error(
+                    n, 'Documentation nodes should not have children.')
             doc += n.text[2:] + '\n'
         if doc == '' and not optional:
             import sys
-            sys.stderr.write('Missing documentation for: {}\n'.format(
-                node.text))
+            sys.stderr.write('{}: Missing documentation for: {}\n'.format(
+                node.location, node.text))
         return doc
 
     @staticmethod
     def __expect_no_children(node):
-        if len(node.children) > 0:
-            raise Exception('Unexpected node inside {}: {}'.format(
-                node.text, node.children[0].text))
+        if not node.at_end():
+            child = node.next()
+            raise AbiParser.__error(
+                child,
+                'Unexpected node inside {}: {}'.format(node.text, child.text))
+
+    # Returns an exception for an error in the specification, prefixed by
+    # the location of the node at which it was found.
+    @staticmethod
+    def __error(node, message):
+        return Exception('{}: {}'.format(node.location, message))
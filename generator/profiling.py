@@ -0,0 +1,183 @@
+# Copyright (c) 2016 Nuxi (https://nuxi.nl/) and contributors.
+#
+# SPDX-License-Identifier: BSD-2-Clause
+
+# Measurement of the phases of generate.py, used by its --profile flag.
+#
+# Every phase records its wall time, CPU time and the peak amount of memory
+# allocated through tracemalloc while it ran, on top of what was already
+# allocated when it started. Phases that are not a single
+# block of code, such as computing layouts while parsing, are measured by
+# temporarily wrapping the functions involved and accumulating the time
+# spent in them. The results are written in Chrome's trace event format, so
+# that they can be inspected using chrome://tracing or Perfetto.
+
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Profiler:
+    def __init__(self, cprofile_dir=None):
+        self._cprofile_dir = cprofile_dir
+        self._events = []
+        self._peaks = []
+        self._totals = {}
+        self._patches = []
+        self._start = time.perf_counter()
+        tracemalloc.start()
+
+    def _timestamp(self, t):
+        return int((t - self._start) * 1e6)
+
+    # Measures the code run within the context as a phase.
+    @contextmanager
+    def phase(self, name, category='generate'):
+        # tracemalloc only keeps track of a single peak. The peaks of the
+        # phases that are still running are kept on a stack. Fold the peak
+        # measured so far into the enclosing phase and restart measuring from
+        # the current usage.
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1],
+                                  tracemalloc.get_traced_memory()[1])
+        self._peaks.append(0)
+        tracemalloc.reset_peak()
+        # The peaks are absolute. Report them relative to the usage at the
+        # start of the phase, so that memory held by earlier phases, like
+        # the parsed ABI, is not attributed to this one.
+        base = tracemalloc.get_traced_memory()[0]
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            cpu = time.process_time() - cpu
+            end = time.perf_counter()
+            peak = max(tracemalloc.get_traced_memory()[1], self._peaks.pop())
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._events.append({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': self._timestamp(wall),
+                'dur': int((end - wall) * 1e6),
+                'pid': os.getpid(),
+                'tid': 1,
+                'args': {
+                    'cpu_ms': round(cpu * 1e3, 3),
+                    'peak_kb': round((peak - base) / 1024, 1),
+                },
+            })
+
+    # Calls a function as part of a phase, storing a cProfile dump of the
+    # call if requested.
+    def call(self, name, function, *args):
+        if self._cprofile_dir is None:
+            return function(*args)
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(function, *args)
+        finally:
+            os.makedirs(self._cprofile_dir, exist_ok=True)
+            profile.dump_stats(
+                os.path.join(self._cprofile_dir,
+                             name.replace('/', '_') + '.prof'))
+
+    # Replaces an attribute holding a function by a version that accumulates
+    # the time spent in it under the provided name. Nested calls of functions
+    # instrumented under the same name are only accounted for once.
+    def instrument(self, obj, attr, name):
+        original = obj.__dict__[attr]
+        function = original
+        if isinstance(original, staticmethod):
+            function = original.__func__
+        totals = self._totals.setdefault(name, {
+            'calls': 0,
+            'wall': 0.0,
+            'cpu': 0.0,
+            'first': None,
+            'depth': 0,
+        })
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if totals['depth'] > 0:
+                return function(*args, **kwargs)
+            totals['depth'] += 1
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                totals['calls'] += 1
+                totals['wall'] += time.perf_counter() - wall
+                totals['cpu'] += time.process_time() - cpu
+                if totals['first'] is None:
+                    totals['first'] = wall
+                totals['depth'] -= 1
+
+        if isinstance(original, staticmethod):
+            wrapper = staticmethod(wrapper)
+        setattr(obj, attr, wrapper)
+        self._patches.append((obj, attr, original))
+
+    # Restores all instrumented functions, turning the accumulated times into
+    # events. These are placed on a separate thread in the trace, starting at
+    # the first call, as they don't correspond to a single span of time.
+    def _restore(self):
+        for obj, attr, original in reversed(self._patches):
+            setattr(obj, attr, original)
+        self._patches = []
+        for name, totals in sorted(self._totals.items()):
+            if totals['calls'] > 0:
+                self._events.append({
+                    'name': name,
+                    'cat': 'accumulated',
+                    'ph': 'X',
+                    'ts': self._timestamp(totals['first']),
+                    'dur': int(totals['wall'] * 1e6),
+                    'pid': os.getpid(),
+                    'tid': 2,
+                    'args': {
+                        'cpu_ms': round(totals['cpu'] * 1e3, 3),
+                        'calls': totals['calls'],
+                    },
+                })
+        self._totals = {}
+
+    # Writes the trace file and prints a summary of all phases.
+    def finish(self, file_name):
+        self._restore()
+        tracemalloc.stop()
+        events = sorted(self._events, key=lambda e: (e['tid'], e['ts']))
+        for tid, name in [(1, 'phases'), (2, 'accumulated')]:
+            events.append({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': os.getpid(),
+                'tid': tid,
+                'args': {
+                    'name': name
+                },
+            })
+        with open(file_name, 'w') as f:
+            json.dump({'traceEvents': events}, f, indent=1)
+            f.write('\n')
+
+        for e in events:
+            if e['ph'] == 'X':
+                sys.stderr.write('{:40} {:9.3f}ms wall {:9.3f}ms cpu'.format(
+                    e['name'], e['dur'] / 1e3, e['args']['cpu_ms']))
+                if 'peak_kb' in e['args']:
+                    sys.stderr.write(' {:10.1f}KiB peak'.format(
+                        e['args']['peak_kb']))
+                else:
+                    sys.stderr.write(' {:7} calls'.format(e['args']['calls']))
+                sys.stderr.write('\n')
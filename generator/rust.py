@@ -3,8 +3,6 @@
 # This file is distributed under a 2-clause BSD license.
 # See the LICENSE and CONTRIBUTORS files for details.
 
-import re
-
 from .abi import *
 from .format import format_list
 from .generator import *
@@ -45,21 +43,24 @@ class RustGenerator(Generator):
         else:
             raise Exception('Unknown link target: {}'.format(repr(path)))
 
-    def print_doc(self, abi, thing, indent='', prefix='///'):
-        def make_link(match):
-            path = abi.resolve_path(match.group(1))
-            assert path is not None
-            return '[`{}`]{}'.format(MarkdownRustNaming().link_name(*path),
-                                     self.doc_link(*path))
+    def link(self, *path):
+        return self._links.get(path[0], path[1:], lambda: self._link(path))
+
+    def _link(self, path):
+        return '[`{}`]{}'.format(self.link_naming.link_name(*path),
+                                 self.doc_link(*path))
 
+    def print_doc(self, abi, thing, indent='', prefix='///'):
         if hasattr(thing, 'doc'):
             for line in thing.doc.splitlines():
-                line = re.sub(r'\[([\w.]+)\](?!\()', make_link, line)
-                print((indent + prefix + ' ' + line).rstrip())
+                line = self.link_references(abi, line, self.link)
+                self.out.print((indent + prefix + ' ' + line).rstrip())
 
     def __init__(self, naming):
         super().__init__(comment_prefix='// ')
         self.naming = naming
+        self.link_naming = MarkdownRustNaming()
+        self._links = ModelCache()
 
     def syscall_params(self, syscall):
         params = []
@@ -72,21 +73,21 @@ class RustGenerator(Generator):
 
     def generate_head(self, abi):
         super().generate_head(abi)
-        print('// Appease Rust\'s tidy.')
-        print('// ignore-license')
-        print('// ignore-tidy-linelength')
-        print()
-        print('//! **PLEASE NOTE: This entire crate including this')
-        print('//! documentation is automatically generated from')
-        print(
+        self.out.print('// Appease Rust\'s tidy.')
+        self.out.print('// ignore-license')
+        self.out.print('// ignore-tidy-linelength')
+        self.out.print()
+        self.out.print('//! **PLEASE NOTE: This entire crate including this')
+        self.out.print('//! documentation is automatically generated from')
+        self.out.print(
             '//! [`cloudabi.txt`](https://github.com/NuxiNL/cloudabi/blob/master/cloudabi.txt)**'
         )
-        print('//!')
+        self.out.print('//!')
         self.print_doc(abi, abi, '', '//!')
-        print()
-        print('#![no_std]')
-        print('#![allow(non_camel_case_types)]')
-        print('''
+        self.out.print()
+        self.out.print('#![no_std]')
+        self.out.print('#![allow(non_camel_case_types)]')
+        self.out.print('''
 #[cfg(feature = "bitflags")]
 use bitflags::bitflags;
 
@@ -115,10 +116,10 @@ macro_rules! bitflags {
     def generate_type(self, abi, type):
 
         if isinstance(type, FlagsType):
-            print('bitflags! {')
+            self.out.print('bitflags! {')
             self.print_doc(abi, type, '  ')
-            print('  #[repr(C)]')
-            print('  pub struct {}: {} {{'.format(
+            self.out.print('  #[repr(C)]')
+            self.out.print('  pub struct {}: {} {{'.format(
                 self.naming.typename(type),
                 self.naming.typename(type.int_type)))
             if len(type.values) > 0:
@@ -127,22 +128,25 @@ macro_rules! bitflags {
                 val_format = '#0{}x'.format(type.layout.size[0] * 2 + 2)
                 for v in type.values:
                     self.print_doc(abi, v, '    ')
-                    print('    const {name:{width}} = {val:{val_format}};'.
-                          format(name=self.naming.valname(type, v),
-                                 width=width,
-                                 val=v.value,
-                                 val_format=val_format))
+                    self.out.print(
+                        '    const {name:{width}} = {val:{val_format}};'.
+                        format(name=self.naming.valname(type, v),
+                               width=width,
+                               val=v.value,
+                               val_format=val_format))
             else:
-                print('    const DEFAULT = 0;')
-            print('  }')
-            print('}')
+                self.out.print('    const DEFAULT = 0;')
+            self.out.print('  }')
+            self.out.print('}')
 
         elif isinstance(type, EnumType):
             self.print_doc(abi, type)
-            print('#[repr({})]'.format(self.naming.typename(type.int_type)))
-            print('#[derive(Copy, Clone, Eq, PartialEq, Hash, Debug)]')
-            print('#[non_exhaustive]')
-            print('pub enum {} {{'.format(self.naming.typename(type)))
+            self.out.print('#[repr({})]'.format(
+                self.naming.typename(type.int_type)))
+            self.out.print(
+                '#[derive(Copy, Clone, Eq, PartialEq, Hash, Debug)]')
+            self.out.print('#[non_exhaustive]')
+            self.out.print('pub enum {} {{'.format(self.naming.typename(type)))
             if len(type.values) > 0:
                 width = max(
                     len(self.naming.valname(type, v)) for v in type.values)
@@ -150,24 +154,26 @@ macro_rules! bitflags {
                     max(len(str(v.value)) for v in type.values))
                 for v in type.values:
                     self.print_doc(abi, v, '  ')
-                    print('  {name:{width}} = {val:{val_format}},'.format(
-                        name=self.naming.valname(type, v),
-                        width=width,
-                        val=v.value,
-                        val_format=val_format))
-            print('}')
+                    self.out.print(
+                        '  {name:{width}} = {val:{val_format}},'.format(
+                            name=self.naming.valname(type, v),
+                            width=width,
+                            val=v.value,
+                            val_format=val_format))
+            self.out.print('}')
 
         elif isinstance(type, OpaqueType) or isinstance(type, AliasType):
             self.print_doc(abi, type)
             if isinstance(type, OpaqueType):
-                print('#[repr(C)]')
-                print('#[derive(Copy, Clone, Eq, PartialEq, Hash, Debug)]')
-                print('pub struct {}(pub {});'.format(
+                self.out.print('#[repr(C)]')
+                self.out.print(
+                    '#[derive(Copy, Clone, Eq, PartialEq, Hash, Debug)]')
+                self.out.print('pub struct {}(pub {});'.format(
                     self.naming.typename(type),
                     self.naming.typename(type.int_type)))
                 const_format = 'pub const {name:{width}}: {type} = {type}({val:{val_format}});'
             else:
-                print('pub type {} = {};'.format(
+                self.out.print('pub type {} = {};'.format(
                     self.naming.typename(type),
                     self.naming.typename(type.int_type)))
                 const_format = 'pub const {name:{width}}: {type} = {val:{val_format}};'
@@ -188,7 +194,7 @@ macro_rules! bitflags {
                     val_format = '{}d'.format(val_width)
                 for v in type.values:
                     self.print_doc(abi, v)
-                    print(
+                    self.out.print(
                         const_format.format(name=self.naming.valname(type, v),
                                             width=width,
                                             type=self.naming.typename(type),
@@ -198,15 +204,16 @@ macro_rules! bitflags {
         elif isinstance(type, FunctionType):
             self.print_doc(abi, type)
             for param in type.parameters.raw_members:
-                print('///')
-                print('/// **{}**:'.format(param.name))
+                self.out.print('///')
+                self.out.print('/// **{}**:'.format(param.name))
                 self.print_doc(abi, param)
-            print('pub type {} = unsafe extern "C" fn('.format(
+            self.out.print('pub type {} = unsafe extern "C" fn('.format(
                 self.naming.typename(type)))
             for param in type.parameters.raw_members:
-                print('  {}: {},'.format(param.name,
-                                         self.naming.typename(param.type)))
-            print(') -> {};'.format(self.naming.typename(type.return_type)))
+                self.out.print('  {}: {},'.format(
+                    param.name, self.naming.typename(param.type)))
+            self.out.print(') -> {};'.format(
+                self.naming.typename(type.return_type)))
 
         elif isinstance(type, StructType):
             structs = [(self.naming.typename(type), type)]
@@ -215,27 +222,28 @@ macro_rules! bitflags {
             while len(structs) > 0 or len(unions) > 0:
                 for name, struct in structs:
                     self.print_doc(abi, struct)
-                    print('#[repr(C)]')
-                    print('#[derive(Copy, Clone)]')
-                    print('pub struct {} {{'.format(name))
+                    self.out.print('#[repr(C)]')
+                    self.out.print('#[derive(Copy, Clone)]')
+                    self.out.print('pub struct {} {{'.format(name))
                     for m in struct.members:
                         self.print_doc(abi, m, '  ')
                         if isinstance(m, SimpleStructMember):
-                            print('  pub {}: {},'.format(
+                            self.out.print('  pub {}: {},'.format(
                                 self.naming.fieldname(m.name),
                                 self.naming.typename(m.type)))
                         elif isinstance(m, RangeStructMember):
-                            print('  pub {}: ({}, {}),'.format(
+                            self.out.print('  pub {}: ({}, {}),'.format(
                                 self.naming.fieldname(m.name),
                                 self.naming.typename(m.raw_members[0].type),
                                 self.naming.typename(m.raw_members[1].type)))
                         elif isinstance(m, VariantStructMember):
                             unions.append((name + '_union', m))
-                            print('  pub union: {}_union'.format(name))
+                            self.out.print(
+                                '  pub union: {}_union'.format(name))
                         else:
                             raise Exception(
                                 'Unknown struct member: {}'.format(m))
-                    print('}')
+                    self.out.print('}')
 
                 structs = []
 
@@ -244,34 +252,35 @@ macro_rules! bitflags {
                 assert (len(unions) <= 1)
 
                 for name, union in unions:
-                    print('/// A union inside `{}`.'.format(
+                    self.out.print('/// A union inside `{}`.'.format(
                         self.naming.typename(type)))
-                    print('#[repr(C)]')
-                    print('#[derive(Copy, Clone)]')
-                    print('pub union {} {{'.format(name))
+                    self.out.print('#[repr(C)]')
+                    self.out.print('#[derive(Copy, Clone)]')
+                    self.out.print('pub union {} {{'.format(name))
                     for x in union.members:
-                        print('  /// Used when [`{}`]{} is {}.'.format(
-                            union.tag.name, self.doc_link(type, union.tag),
-                            format_list('or', [
-                                '[`{}`]{}'.format(
-                                    self.naming.valname(union.tag.type, v),
-                                    self.doc_link(union.tag.type, v))
-                                for v in x.tag_values
-                            ])))
+                        self.out.print(
+                            '  /// Used when [`{}`]{} is {}.'.format(
+                                union.tag.name, self.doc_link(type, union.tag),
+                                format_list('or', [
+                                    '[`{}`]{}'.format(
+                                        self.naming.valname(union.tag.type, v),
+                                        self.doc_link(union.tag.type, v))
+                                    for v in x.tag_values
+                                ])))
                         if x.name is None:
                             assert (len(x.type.members) == 1)
                             m = x.type.members[0]
                             self.print_doc(abi, m, '  ')
-                            print('  pub {}: {},'.format(
+                            self.out.print('  pub {}: {},'.format(
                                 self.naming.fieldname(m.name),
                                 self.naming.typename(m.type)))
                         else:
                             structname = '{}_{}'.format(
                                 self.naming.typename(type), x.name)
                             structs.append((structname, x.type))
-                            print('  pub {}: {},'.format(
+                            self.out.print('  pub {}: {},'.format(
                                 self.naming.fieldname(x.name), structname))
-                    print('}')
+                    self.out.print('}')
 
                 unions = []
 
@@ -280,94 +289,102 @@ macro_rules! bitflags {
         else:
             raise Exception('Unknown class of type: {}'.format(type))
 
-        print()
+        self.out.print()
 
     def generate_struct_tests(self, type):
-        configs = [(0, 32),
-                   (1, 64)] if type.layout.machine_dep else [(0, None)]
+        # Rust can only distinguish data models by the size of pointers, so
+        # the first data model for every size of pointers is tested.
+        configs = [(0, None)]
+        if type.layout.machine_dep:
+            pointer_sizes = sorted({m.pointer_size for m in DATA_MODELS})
+            configs = [(data_model_index(size), size * 8)
+                       for size in pointer_sizes]
         for i, bits in configs:
-            print('#[test]')
+            self.out.print('#[test]')
             if bits is not None:
-                print('#[cfg(target_pointer_width = "{}")]'.format(bits))
-            print('fn {}_layout_test{}() {{'.format(
+                self.out.print(
+                    '#[cfg(target_pointer_width = "{}")]'.format(bits))
+            self.out.print('fn {}_layout_test{}() {{'.format(
                 type.name, '_{}'.format(bits) if bits is not None else ''))
-            print('  assert_eq!(core::mem::size_of::<{}>(), {});'.format(
-                self.naming.typename(type), type.layout.size[i]))
-            print('  assert_eq!(core::mem::align_of::<{}>(), {});'.format(
-                self.naming.typename(type), type.layout.align[i]))
+            self.out.print(
+                '  assert_eq!(core::mem::size_of::<{}>(), {});'.format(
+                    self.naming.typename(type), type.layout.size[i]))
+            self.out.print(
+                '  assert_eq!(core::mem::align_of::<{}>(), {});'.format(
+                    self.naming.typename(type), type.layout.align[i]))
             mut = ''
             if any(isinstance(m, VariantStructMember) for m in type.members):
                 mut = 'mut '
-            print('  let {}obj = '.format(mut), end='')
+            self.out.print('  let {}obj = '.format(mut), end='')
             self.generate_test_value(type, '  ')
-            print(';')
-            print('  let base = &obj as *const _ as usize;')
+            self.out.print(';')
+            self.out.print('  let base = &obj as *const _ as usize;')
             self.generate_offset_asserts(type, type.members, i)
-            print('}')
+            self.out.print('}')
 
     def generate_test_value(self, type, indent='', typename=None):
         if typename is None:
             typename = self.naming.typename(type)
 
         if isinstance(type, VoidType):
-            print('()', end='')
+            self.out.print('()', end='')
 
         elif isinstance(type, IntType) or isinstance(type, AliasType):
-            print('0', end='')
+            self.out.print('0', end='')
 
         elif isinstance(type, PointerType):
             if isinstance(type.target_type, FunctionType):
-                print('{{ extern "C" fn f({}) -> {} {{'.format(
+                self.out.print('{{ extern "C" fn f({}) -> {} {{'.format(
                     ', '.join('_: {}'.format(self.naming.typename(t.type))
                               for t in type.target_type.parameters.members),
                     self.naming.typename(type.target_type.return_type),
                 ),
-                      end='')
+                               end='')
                 if not isinstance(type.target_type.return_type, VoidType):
-                    print(' ', end='')
+                    self.out.print(' ', end='')
                     self.generate_test_value(type.target_type.return_type,
                                              indent + '  ')
-                    print(' ', end='')
-                print('} f }', end='')
+                    self.out.print(' ', end='')
+                self.out.print('} f }', end='')
             else:
-                print('0 as {}'.format(typename), end='')
+                self.out.print('0 as {}'.format(typename), end='')
 
         elif isinstance(type, FlagsType) or isinstance(type, EnumType):
             if len(type.values) > 0:
                 valname = self.naming.valname(type, type.values[0])
             else:
                 valname = 'DEFAULT'
-            print('{}::{}'.format(typename, valname), end='')
+            self.out.print('{}::{}'.format(typename, valname), end='')
 
         elif isinstance(type, OpaqueType):
-            print('{}(0)'.format(typename), end='')
+            self.out.print('{}(0)'.format(typename), end='')
 
         elif isinstance(type, ArrayType):
-            print('[', end='')
+            self.out.print('[', end='')
             self.generate_test_value(type.element_type, indent + '  ')
-            print('; {}]'.format(type.count), end='')
+            self.out.print('; {}]'.format(type.count), end='')
 
         elif isinstance(type, StructType):
-            print('{} {{'.format(typename))
+            self.out.print('{} {{'.format(typename))
             for m in type.members:
                 if isinstance(m, SimpleStructMember):
-                    print('{}  {}: '.format(indent,
-                                            self.naming.fieldname(m.name)),
-                          end='')
+                    self.out.print('{}  {}: '.format(
+                        indent, self.naming.fieldname(m.name)),
+                                   end='')
                     self.generate_test_value(m.type, indent + '  ')
                 elif isinstance(m, RangeStructMember):
-                    print('{}  {}: (0 as *{} _, 0)'.format(
+                    self.out.print('{}  {}: (0 as *{} _, 0)'.format(
                         indent,
                         self.naming.fieldname(m.name),
                         'const' if m.const else 'mut',
                     ),
-                          end='')
+                                   end='')
                 else:
-                    print('{}  union: '.format(indent), end='')
+                    self.out.print('{}  union: '.format(indent), end='')
                     self.generate_test_union_value(type, m.members[0],
                                                    indent + '  ')
-                print(',')
-            print('{}}}'.format(indent), end='')
+                self.out.print(',')
+            self.out.print('{}}}'.format(indent), end='')
 
         else:
             raise Exception('Unknown class of type: {}'.format(type))
@@ -378,15 +395,15 @@ macro_rules! bitflags {
         if variant.name is None:
             self.generate_test_value(variant.type, indent, typename=unionname)
         else:
-            print('{} {{'.format(unionname))
+            self.out.print('{} {{'.format(unionname))
             memname = self.naming.fieldname(variant.name)
-            print('{}  {}: '.format(indent, memname), end='')
+            self.out.print('{}  {}: '.format(indent, memname), end='')
             self.generate_test_value(variant.type,
                                      indent + '  ',
                                      typename='{}_{}'.format(
                                          typename, memname))
-            print(',')
-            print('{}}}'.format(indent), end='')
+            self.out.print(',')
+            self.out.print('{}}}'.format(indent), end='')
 
     def generate_offset_asserts(self,
                                 type,
@@ -409,16 +426,17 @@ macro_rules! bitflags {
                         self.naming.typename(type),
                         self.naming.fieldname(m.name))
                     mprefix += fieldname + '.'
-                print('  obj.{}union.{} = '.format(prefix, fieldname), end='')
+                self.out.print('  obj.{}union.{} = '.format(prefix, fieldname),
+                               end='')
                 self.generate_test_value(fieldtype,
                                          indent='  ',
                                          typename=fieldtypename)
-                print(';')
-                print('  unsafe {')
+                self.out.print(';')
+                self.out.print('  unsafe {')
                 self.generate_offset_asserts(m.type, m.type.members,
                                              machine_index, mprefix, offset,
                                              indent + '  ')
-                print('  }')
+                self.out.print('  }')
             elif isinstance(m, RangeStructMember):
                 for i, raw_m in enumerate(m.raw_members):
                     moffset = offset + raw_m.offset[machine_index]
@@ -437,19 +455,21 @@ macro_rules! bitflags {
                         indent)
 
     def generate_offset_assert(self, member_name, offset, indent=''):
-        print('{}assert_eq!(&obj.{} as *const _ as usize - base, {});'.format(
-            indent, member_name, offset))
+        self.out.print(
+            '{}assert_eq!(&obj.{} as *const _ as usize - base, {});'.format(
+                indent, member_name, offset))
 
     def generate_syscalls(self, abi, syscalls):
-        print('/// The table with pointers to all syscall implementations.')
-        print('#[allow(improper_ctypes)]')
-        print('extern "C" {')
-        for s in sorted(abi.syscalls):
-            self.generate_syscall_declaration(abi, abi.syscalls[s])
-        print('}')
-        for s in sorted(abi.syscalls):
-            print()
-            self.generate_syscall_wrapper(abi, abi.syscalls[s])
+        self.out.print(
+            '/// The table with pointers to all syscall implementations.')
+        self.out.print('#[allow(improper_ctypes)]')
+        self.out.print('extern "C" {')
+        for syscall in abi.syscalls_by_number():
+            self.generate_syscall_declaration(abi, syscall)
+        self.out.print('}')
+        for syscall in abi.syscalls_by_number():
+            self.out.print()
+            self.generate_syscall_wrapper(abi, syscall)
 
     def generate_syscall_declaration(self, abi, syscall):
         if syscall.noreturn:
@@ -462,22 +482,21 @@ macro_rules! bitflags {
         for p in syscall.output.raw_members:
             params.append('_: ' +
                           self.naming.typename(OutputPointerType(p.type)))
-        print('  fn cloudabi_sys_{}({}) -> {};'.format(syscall.name,
-                                                       ', '.join(params),
-                                                       return_type))
+        self.out.print('  fn cloudabi_sys_{}({}) -> {};'.format(
+            syscall.name, ', '.join(params), return_type))
 
     def generate_syscall_wrapper(self, abi, syscall):
         self.print_doc(abi, syscall)
 
         if syscall.input.members or syscall.output.members:
-            print('///\n/// ## Parameters')
+            self.out.print('///\n/// ## Parameters')
         for p in syscall.input.members + syscall.output.members:
-            print('///\n/// **{}**:'.format(p.name))
+            self.out.print('///\n/// **{}**:'.format(p.name))
             self.print_doc(abi, p)
             if getattr(p, 'special_values', None):
-                print('/// Possible values:\n///')
+                self.out.print('/// Possible values:\n///')
                 for val in p.special_values:
-                    print('///   - [`{}`]{}:'.format(
+                    self.out.print('///   - [`{}`]{}:'.format(
                         self.naming.valname(p.type, val),
                         self.doc_link(p.type, val)))
                     self.print_doc(abi, val, '', '///    ')
@@ -493,10 +512,9 @@ macro_rules! bitflags {
         for p in syscall.output.members:
             params.append(self.syscall_param(p, True))
 
-        print('#[inline]')
-        print('pub unsafe fn {}({}) -> {} {{'.format(syscall.name,
-                                                     ', '.join(params),
-                                                     return_type))
+        self.out.print('#[inline]')
+        self.out.print('pub unsafe fn {}({}) -> {} {{'.format(
+            syscall.name, ', '.join(params), return_type))
 
         args = []
         for p in syscall.input.members:
@@ -514,8 +532,9 @@ macro_rules! bitflags {
             assert not isinstance(p, RangeStructMember)
             args.append(p.name + '_')
 
-        print('  cloudabi_sys_{}({})'.format(syscall.name, ', '.join(args)))
-        print('}')
+        self.out.print('  cloudabi_sys_{}({})'.format(syscall.name,
+                                                      ', '.join(args)))
+        self.out.print('}')
 
     def syscall_param(self, p, output=False):
         name = p.name + '_'
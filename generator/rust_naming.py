@@ -4,9 +4,12 @@ from .markdown_naming import *
 
 class RustNaming:
     def __init__(self):
-        pass
+        self._typenames = ModelCache()
 
     def typename(self, type):
+        return self._typenames.get(type, None, lambda: self._typename(type))
+
+    def _typename(self, type):
         if isinstance(type, VoidType):
             return '()'
         elif isinstance(type, IntType):
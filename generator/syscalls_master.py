@@ -11,7 +11,7 @@ class SyscallsMasterGenerator(Generator):
         super().__init__(comment_prefix='; ')
         self.naming = naming
 
-    def generate_abi(self, abi):
+    def generate(self, abi):
         self.generate_head(abi)
         self.generate_includes(abi)
         self.generate_types(abi, abi.types)
@@ -19,16 +19,16 @@ class SyscallsMasterGenerator(Generator):
         self.generate_foot(abi)
 
     def generate_head(self, abi):
-        print(' $FreeBSD$\n')
+        self.out.print(' $FreeBSD$\n')
         super().generate_head(abi)
 
     def generate_includes(self, abi):
-        print('#include <sys/sysent.h>')
-        print('#include <sys/sysproto.h>')
-        print()
-        print('#include <contrib/cloudabi/cloudabi64_types.h>')
-        print()
-        print('#include <compat/cloudabi64/cloudabi64_proto.h>')
+        self.out.print('#include <sys/sysent.h>')
+        self.out.print('#include <sys/sysproto.h>')
+        self.out.print()
+        self.out.print('#include <contrib/cloudabi/cloudabi64_types.h>')
+        self.out.print()
+        self.out.print('#include <compat/cloudabi64/cloudabi64_proto.h>')
 
     def generate_types(self, abi, types):
         pass
@@ -48,7 +48,7 @@ class SyscallsMasterGenerator(Generator):
                 return_type = t
 
         return_type_name = self.naming.typename(return_type)
-        print('\n{}\t{}\t{}\t{{ {}{}{}({}); }}'.format(
+        self.out.print('\n{}\t{}\t{}\t{{ {}{}{}({}); }}'.format(
             abi.syscall_number(syscall), 'AUE_NULL', 'STD', return_type_name,
             ' ' if len(return_type_name) < 16 else line_break,
             self.naming.syscallname(syscall), ','.join(params)))
@@ -0,0 +1,312 @@
+# Copyright (c) 2016 Nuxi (https://nuxi.nl/) and contributors.
+#
+# SPDX-License-Identifier: BSD-2-Clause
+
+# Description of all of the files that generate.py produces from the ABI.
+#
+# Every target is described using plain data (the backend class, the naming
+# class and the constructor arguments), as opposed to containing generator
+# objects directly. This allows targets to be sent to worker processes and
+# ensures that backends are only imported once they are actually used. For
+# the same reason, modules only needed to render or format outputs are
+# imported on first use.
+
+import os
+
+from . import load_class
+
+CLANG_FORMAT_STYLE = '''{
+               BasedOnStyle: Google,
+               AllowShortIfStatementsOnASingleLine: false,
+               AllowShortLoopsOnASingleLine: false,
+               AllowShortFunctionsOnASingleLine: None,
+               DerivePointerBinding: false,
+               PointerAlignment: Right,
+         }'''
+
+
+# Formats C sources, stored in a dictionary indexed by file name. All of the
+# sources are formatted using a single invocation of clang-format.
+def clang_format(sources):
+    if not sources:
+        return {}
+    import subprocess
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_names = {}
+        for i, (path, contents) in enumerate(sorted(sources.items())):
+            file_name = os.path.join(tmpdir,
+                                     '{}_{}'.format(i, os.path.basename(path)))
+            with open(file_name, 'wb') as f:
+                f.write(contents)
+            file_names[path] = file_name
+        subprocess.run(['clang-format', '-i', '-style=' + CLANG_FORMAT_STYLE] +
+                       list(file_names.values()),
+                       check=True)
+        formatted = {}
+        for path, file_name in file_names.items():
+            with open(file_name, 'rb') as f:
+                formatted[path] = f.read()
+        return formatted
+
+
+def _create(module, cls, args, kwargs):
+    return load_class(module, cls)(*args, **kwargs)
+
+
+# Namings memoize the names they generate, so targets using the same naming
+# share a single instance of it.
+_namings = {}
+
+
+def _create_naming(naming):
+    key = repr(naming)
+    if key not in _namings:
+        _namings[key] = _create(*naming)
+    return _namings[key]
+
+
+def c_naming(*args, **kwargs):
+    return ('c_naming', 'CNaming', args, kwargs)
+
+
+def markdown_c_naming(*args, **kwargs):
+    return ('c_naming', 'MarkdownCNaming', args, kwargs)
+
+
+def rust_naming(*args, **kwargs):
+    return ('rust_naming', 'RustNaming', args, kwargs)
+
+
+def markdown_rust_naming(*args, **kwargs):
+    return ('rust_naming', 'MarkdownRustNaming', args, kwargs)
+
+
+class Target:
+    def __init__(self,
+                 path,
+                 backend,
+                 naming=None,
+                 clang_format=False,
+                 html=None,
+                 **kwargs):
+        self.path = path
+        self.group = path.split('/')[0]
+        self.backend = backend
+        self.naming = naming
+        self.clang_format = clang_format
+        self.html = html
+        self.kwargs = kwargs
+
+    # The names of all of the files belonging to this target.
+    @property
+    def outputs(self):
+        return [self.path] + ([self.html] if self.html is not None else [])
+
+    # Returns a string describing the arguments of the target, used as part
+    # of the key under which its outputs are cached.
+    def describe(self):
+        return repr((self.path, self.backend, self.naming, self.clang_format,
+                     self.html, sorted(self.kwargs.items())))
+
+    def create_generator(self):
+        kwargs = dict(self.kwargs)
+        if self.naming is not None:
+            kwargs['naming'] = _create_naming(self.naming)
+        if 'md_type' in kwargs:
+            from .abi import int_types
+            kwargs['md_type'] = int_types[kwargs['md_type']]
+        if 'data_model' in kwargs:
+            from .layout import DATA_MODELS
+            models = {m.name: m for m in DATA_MODELS}
+            if kwargs['data_model'] not in models:
+                raise Exception('Unknown data model: {}'.format(
+                    kwargs['data_model']))
+            kwargs['data_model'] = models[kwargs['data_model']]
+        module, cls = self.backend
+        return _create(module, cls, (), kwargs)
+
+    def generate(self, abi):
+        from .writer import CodeWriter
+        out = CodeWriter()
+        self.create_generator().generate_abi(abi, out)
+        return out.getvalue()
+
+    # Returns the outputs of this target, given the text it generated.
+    def outputs_for(self, text):
+        outputs = [(self.path, text.encode('UTF-8'))]
+        if self.html is not None:
+            outputs.append((self.html, self.render_html(text)))
+        return outputs
+
+    # Converts the Markdown generated by this target to a full HTML page.
+    def render_html(self, text):
+        from .markdown_html import markdown_to_html
+        html = markdown_to_html(text).encode('UTF-8')
+        parts = os.path.join(os.path.dirname(__file__), '..', 'parts')
+        with open(os.path.join(parts, 'head.html'), 'rb') as f:
+            head = f.read()
+        with open(os.path.join(parts, 'foot.html'), 'rb') as f:
+            foot = f.read()
+        return head + html + foot
+
+    # Generates the contents of all of the files belonging to this target.
+    # Returns a list of pairs of file names and file contents. C sources
+    # still need to be passed through clang_format() afterwards, so that all
+    # of them can be formatted at once.
+    def render(self, abi):
+        return self.outputs_for(self.generate(abi))
+
+
+# Splits targets into groups of targets using the same backend, which can be
+# generated in a single traversal of the ABI using render_group().
+def group_targets(targets):
+    groups = {}
+    for target in targets:
+        groups.setdefault(target.backend, []).append(target)
+    return list(groups.values())
+
+
+# Generates the contents of all of the files belonging to a group of targets
+# using the same backend, like Target.render() does for a single target.
+def render_group(targets, abi):
+    if len(targets) == 1:
+        return targets[0].render(abi)
+    from .generator import generate_abi_together
+    from .writer import CodeWriter
+    outs = [CodeWriter() for target in targets]
+    generate_abi_together([t.create_generator() for t in targets], abi, outs)
+    outputs = []
+    for target, out in zip(targets, outs):
+        outputs.extend(target.outputs_for(out.getvalue()))
+    return outputs
+
+
+C_TYPES_COMMON_PREAMBLE = (
+    '#if defined(__FreeBSD__) && defined(_KERNEL)\n'
+    '#include <sys/types.h>\n'
+    '#elif defined(__linux__) && defined(__KERNEL__)\n'
+    '#include <linux/types.h>\n'
+    '#else\n'
+    '#include <stddef.h>\n'
+    '#include <stdint.h>\n'
+    '#endif\n'
+    '\n'
+    '// Make this code build with g++.\n'
+    '#if defined(__cplusplus) && defined(__GNUC__) && !defined(__clang__)\n'
+    '#define _Alignas alignas\n'
+    '#define _Alignof alignof\n'
+    '#define _Atomic(x) x\n'
+    '#define _Static_assert static_assert\n'
+    '#endif\n')
+
+TARGETS = [
+    Target('headers/cloudabi_types_common.h', ('c', 'CSyscalldefsGenerator'),
+           naming=c_naming('cloudabi_'),
+           header_guard='CLOUDABI_TYPES_COMMON_H',
+           machine_dep=False,
+           preamble=C_TYPES_COMMON_PREAMBLE),
+    Target('headers/cloudabi_types.h', ('c', 'CSyscalldefsGenerator'),
+           naming=c_naming('cloudabi_'),
+           header_guard='CLOUDABI_TYPES_H',
+           machine_dep=True,
+           preamble='#include "cloudabi_types_common.h"\n'),
+    Target('headers/cloudabi32_types.h', ('c', 'CSyscalldefsGenerator'),
+           naming=c_naming('cloudabi_', 'cloudabi32_'),
+           header_guard='CLOUDABI32_TYPES_H',
+           machine_dep=True,
+           md_type='uint32',
+           preamble='#include "cloudabi_types_common.h"\n'),
+    Target('headers/cloudabi64_types.h', ('c', 'CSyscalldefsGenerator'),
+           naming=c_naming('cloudabi_', 'cloudabi64_'),
+           header_guard='CLOUDABI64_TYPES_H',
+           machine_dep=True,
+           md_type='uint64',
+           preamble='#include "cloudabi_types_common.h"\n'),
+    # All types, laid out for systems that align 64-bit integers to 4 bytes,
+    # for code that needs to exchange them with such systems.
+    Target('headers/cloudabi32_align4_types.h', ('c', 'CSyscalldefsGenerator'),
+           naming=c_naming('cloudabi32_align4_'),
+           header_guard='CLOUDABI32_ALIGN4_TYPES_H',
+           md_type='uint32',
+           data_model='ILP32_ALIGN4',
+           preamble=C_TYPES_COMMON_PREAMBLE),
+    Target('headers/cloudabi_syscalls.h', ('c', 'CSyscallsGenerator'),
+           naming=c_naming('cloudabi_'),
+           clang_format=True,
+           header_guard='CLOUDABI_SYSCALLS_H',
+           preamble='#include "cloudabi_types.h"\n'),
+    Target('headers/cloudabi_syscalls_info.h', ('c', 'CSyscallsInfoGenerator'),
+           naming=c_naming('cloudabi_'),
+           header_guard='CLOUDABI_SYSCALLS_INFO_H'),
+    Target('rust/cloudabi.rs', ('rust', 'RustGenerator'),
+           naming=rust_naming()),
+    Target('vdsos/cloudabi_vdso_aarch64.S',
+           ('asm', 'AsmVdsoAarch64Generator')),
+    Target('vdsos/cloudabi_vdso_armv6.S', ('asm', 'AsmVdsoArmv6Generator')),
+    Target('vdsos/cloudabi_vdso_armv6_on_64bit.S',
+           ('asm', 'AsmVdsoArmv6On64bitGenerator')),
+    Target('vdsos/cloudabi_vdso_i686.S', ('asm', 'AsmVdsoI686Generator')),
+    Target('vdsos/cloudabi_vdso_i686_on_64bit.S',
+           ('asm', 'AsmVdsoI686On64bitGenerator')),
+    Target('vdsos/cloudabi_vdso_x86_64.S', ('asm', 'AsmVdsoX86_64Generator')),
+    Target('freebsd/syscalls32.master',
+           ('syscalls_master', 'SyscallsMasterGenerator'),
+           naming=c_naming('cloudabi_', 'cloudabi32_', c11=False)),
+    Target('freebsd/syscalls64.master',
+           ('syscalls_master', 'SyscallsMasterGenerator'),
+           naming=c_naming('cloudabi_', 'cloudabi64_', c11=False)),
+    Target('linux/cloudabi_syscalls.h', ('c', 'CLinuxSyscallsGenerator'),
+           naming=c_naming('cloudabi_', c11=False, pointer_prefix='__user '),
+           clang_format=True,
+           header_guard='CLOUDABI_SYSCALLS_H',
+           machine_dep=False,
+           preamble='#include "cloudabi_types_common.h"\n'),
+    Target('linux/cloudabi64_syscalls.h', ('c', 'CLinuxSyscallsGenerator'),
+           naming=c_naming('cloudabi_',
+                           'cloudabi64_',
+                           c11=False,
+                           pointer_prefix='__user '),
+           clang_format=True,
+           header_guard='CLOUDABI64_SYSCALLS_H',
+           machine_dep=True,
+           preamble='#include "cloudabi64_types.h"\n'),
+    Target('linux/cloudabi64_syscalls_table.h',
+           ('c', 'CLinuxSyscallTableGenerator'),
+           naming=c_naming('cloudabi_',
+                           'cloudabi64_',
+                           c11=False,
+                           pointer_prefix='__user '),
+           clang_format=True,
+           md_type='uint64',
+           preamble='#include <asm/byteorder.h>\n'
+           '\n'
+           '#include "cloudabi_syscalls.h"\n'
+           '#include "cloudabi64_syscalls.h"\n'),
+    Target('docs/cloudabi.md', ('markdown', 'MarkdownGenerator'),
+           naming=markdown_c_naming('cloudabi_'),
+           html='docs/cloudabi.html'),
+    Target('docs/cloudabi-rust.md', ('markdown', 'MarkdownGenerator'),
+           naming=markdown_rust_naming(),
+           html='docs/cloudabi-rust.html'),
+]
+
+
+# Names by which targets can be selected: the group they belong to (the
+# top-level directory in which they are stored) or any of their files.
+def target_names():
+    names = set()
+    for target in TARGETS:
+        names.add(target.group)
+        names.update(target.outputs)
+    return names
+
+
+def select_targets(only=None, skip=()):
+    def matches(target, names):
+        return target.group in names or any(p in names for p in target.outputs)
+
+    return [
+        t for t in TARGETS
+        if (only is None or matches(t, only)) and not matches(t, skip)
+    ]
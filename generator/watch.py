@@ -0,0 +1,162 @@
+# Copyright (c) 2016 Nuxi (https://nuxi.nl/) and contributors.
+#
+# SPDX-License-Identifier: BSD-2-Clause
+
+# Utilities for generate.py's watch mode: monitoring files for changes and
+# reloading modules of the generator package after they have been edited.
+
+import ctypes
+import ctypes.util
+import glob
+import importlib
+import os
+import re
+import select
+import struct
+import sys
+import time
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+# Watches files for changes using Linux's inotify. Directories are watched
+# instead of the files themselves, as editors tend to replace files by
+# renaming new copies over them.
+class InotifyWatcher:
+    def __init__(self, file_names):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._file_names = {os.path.abspath(f) for f in file_names}
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1() failed')
+        self._directories = {}
+        for directory in {os.path.dirname(f) for f in self._file_names}:
+            wd = libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), _IN_MODIFY
+                | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE)
+            if wd < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), 'inotify_add_watch() failed')
+            self._directories[wd] = directory
+
+    # Returns the set of watched files that changed, waiting at most the
+    # provided number of seconds for changes to occur.
+    def poll(self, timeout):
+        changed = set()
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return changed
+        data = os.read(self._fd, 65536)
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            file_name = os.path.join(self._directories[wd], os.fsdecode(name))
+            if file_name in self._file_names:
+                changed.add(file_name)
+        return changed
+
+
+# Watches files for changes by periodically comparing their modification
+# times and sizes. Used on systems that don't support inotify.
+class PollingWatcher:
+    INTERVAL = 0.25
+
+    def __init__(self, file_names):
+        self._file_names = {os.path.abspath(f) for f in file_names}
+        self._stats = {f: self._stat(f) for f in self._file_names}
+
+    @staticmethod
+    def _stat(file_name):
+        try:
+            st = os.stat(file_name)
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, self.INTERVAL))
+        changed = set()
+        for file_name in self._file_names:
+            st = self._stat(file_name)
+            if st != self._stats[file_name]:
+                self._stats[file_name] = st
+                changed.add(file_name)
+        return changed
+
+
+def create_watcher(file_names):
+    try:
+        return InotifyWatcher(file_names)
+    except (AttributeError, OSError):
+        return PollingWatcher(file_names)
+
+
+# Blocks until one or more files change. Events are debounced, so that a
+# sequence of writes in quick succession is reported as a single change.
+def wait_for_changes(watcher, debounce=0.1):
+    changed = set()
+    while not changed:
+        changed = watcher.poll(1.0)
+    while True:
+        more = watcher.poll(debounce)
+        if not more:
+            return changed
+        changed |= more
+
+
+# Returns the modules within the generator package imported by every module,
+# based on the relative imports in their sources.
+def module_imports():
+    imports = {}
+    for file_name in glob.glob(os.path.join(os.path.dirname(__file__),
+                                            '*.py')):
+        with open(file_name) as f:
+            imports[os.path.basename(file_name)[:-3]] = set(
+                re.findall(r'^\s*from \.(\w+) import', f.read(), re.M))
+    return imports
+
+
+# Returns the provided modules and all modules that depend on them, sorted
+# such that every module is listed after the modules it depends on.
+def dependent_modules(modules):
+    imports = module_imports()
+    affected = set()
+
+    def visit(module):
+        if module not in affected:
+            affected.add(module)
+            for m, deps in imports.items():
+                if module in deps:
+                    visit(m)
+
+    for module in modules:
+        visit(module)
+
+    ordered = []
+
+    def order(module):
+        if module in affected and module not in ordered:
+            for dep in sorted(imports.get(module, ())):
+                order(dep)
+            ordered.append(module)
+
+    for module in sorted(affected):
+        order(module)
+    return ordered
+
+
+# Reloads the modules of the generator package that have already been
+# imported, in the order provided.
+def reload_modules(modules):
+    for module in modules:
+        name = '{}.{}'.format(__package__, module)
+        if name in sys.modules:
+            importlib.reload(sys.modules[name])
@@ -0,0 +1,52 @@
+# Copyright (c) 2016 Nuxi (https://nuxi.nl/) and contributors.
+#
+# SPDX-License-Identifier: BSD-2-Clause
+
+from contextlib import contextmanager
+
+
+# Buffer in which generators accumulate their output. Generators write
+# through a CodeWriter instead of printing to sys.stdout, so that multiple
+# generators can run at the same time.
+class CodeWriter:
+    def __init__(self):
+        self._chunks = []
+        self._indent = ''
+        self._at_line_start = True
+
+    def write(self, text):
+        if self._indent == '':
+            self._chunks.append(text)
+            if text != '':
+                self._at_line_start = text.endswith('\n')
+        else:
+            # Prefix every non-empty line with the current indentation.
+            for line in text.splitlines(True):
+                if self._at_line_start and line != '\n':
+                    self._chunks.append(self._indent)
+                self._chunks.append(line)
+                self._at_line_start = line.endswith('\n')
+
+    def print(self, *args, sep=' ', end='\n'):
+        self.write(sep.join(str(arg) for arg in args) + end)
+
+    # Indents all lines written within the context by an additional prefix.
+    @contextmanager
+    def indent(self, prefix='  '):
+        old_indent = self._indent
+        self._indent += prefix
+        try:
+            yield
+        finally:
+            self._indent = old_indent
+
+    # Prints lines such that they form a single logical line, by terminating
+    # all but the last one with an aligned backslash.
+    def print_with_line_continuation(self, lines):
+        width = max(len(line) for line in lines)
+        for line in lines[:-1]:
+            self.print('{}{} \\'.format(line, ' ' * (width - len(line))))
+        self.print(lines[-1])
+
+    def getvalue(self):
+        return ''.join(self._chunks)
@@ -0,0 +1,601 @@
+// Copyright (c) 2016-2019 Nuxi (https://nuxi.nl/) and contributors.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions
+// are met:
+// 1. Redistributions of source code must retain the above copyright
+//    notice, this list of conditions and the following disclaimer.
+// 2. Redistributions in binary form must reproduce the above copyright
+//    notice, this list of conditions and the following disclaimer in the
+//    documentation and/or other materials provided with the distribution.
+//
+// THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS ``AS IS'' AND
+// ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+// ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+// OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+// HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+// LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+// OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+// SUCH DAMAGE.
+//
+// This file is automatically generated. Do not edit.
+//
+// Source: https://github.com/NuxiNL/cloudabi
+
+#ifndef CLOUDABI32_ALIGN4_TYPES_H
+#define CLOUDABI32_ALIGN4_TYPES_H
+
+#if defined(__FreeBSD__) && defined(_KERNEL)
+#include <sys/types.h>
+#elif defined(__linux__) && defined(__KERNEL__)
+#include <linux/types.h>
+#else
+#include <stddef.h>
+#include <stdint.h>
+#endif
+
+// Make this code build with g++.
+#if defined(__cplusplus) && defined(__GNUC__) && !defined(__clang__)
+#define _Alignas alignas
+#define _Alignof alignof
+#define _Atomic(x) x
+#define _Static_assert static_assert
+#endif
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+typedef uint8_t cloudabi32_align4_advice_t;
+#define CLOUDABI32_ALIGN4_ADVICE_DONTNEED   1
+#define CLOUDABI32_ALIGN4_ADVICE_NOREUSE    2
+#define CLOUDABI32_ALIGN4_ADVICE_NORMAL     3
+#define CLOUDABI32_ALIGN4_ADVICE_RANDOM     4
+#define CLOUDABI32_ALIGN4_ADVICE_SEQUENTIAL 5
+#define CLOUDABI32_ALIGN4_ADVICE_WILLNEED   6
+
+typedef uint32_t cloudabi32_align4_auxtype_t;
+#define CLOUDABI32_ALIGN4_AT_ARGDATA      256
+#define CLOUDABI32_ALIGN4_AT_ARGDATALEN   257
+#define CLOUDABI32_ALIGN4_AT_BASE           7
+#define CLOUDABI32_ALIGN4_AT_CANARY       258
+#define CLOUDABI32_ALIGN4_AT_CANARYLEN    259
+#define CLOUDABI32_ALIGN4_AT_NCPUS        260
+#define CLOUDABI32_ALIGN4_AT_NULL           0
+#define CLOUDABI32_ALIGN4_AT_PAGESZ         6
+#define CLOUDABI32_ALIGN4_AT_PHDR           3
+#define CLOUDABI32_ALIGN4_AT_PHNUM          4
+#define CLOUDABI32_ALIGN4_AT_PID          263
+#define CLOUDABI32_ALIGN4_AT_SYSINFO_EHDR 262
+#define CLOUDABI32_ALIGN4_AT_TID          261
+
+typedef uint32_t cloudabi32_align4_clockid_t;
+#define CLOUDABI32_ALIGN4_CLOCK_MONOTONIC          1
+#define CLOUDABI32_ALIGN4_CLOCK_PROCESS_CPUTIME_ID 2
+#define CLOUDABI32_ALIGN4_CLOCK_REALTIME           3
+#define CLOUDABI32_ALIGN4_CLOCK_THREAD_CPUTIME_ID  4
+
+typedef uint32_t cloudabi32_align4_condvar_t;
+#define CLOUDABI32_ALIGN4_CONDVAR_HAS_NO_WAITERS 0
+
+typedef uint64_t cloudabi32_align4_device_t;
+
+typedef uint64_t cloudabi32_align4_dircookie_t;
+#define CLOUDABI32_ALIGN4_DIRCOOKIE_START 0
+
+typedef uint16_t cloudabi32_align4_errno_t;
+#define CLOUDABI32_ALIGN4_ESUCCESS         0
+#define CLOUDABI32_ALIGN4_E2BIG            1
+#define CLOUDABI32_ALIGN4_EACCES           2
+#define CLOUDABI32_ALIGN4_EADDRINUSE       3
+#define CLOUDABI32_ALIGN4_EADDRNOTAVAIL    4
+#define CLOUDABI32_ALIGN4_EAFNOSUPPORT     5
+#define CLOUDABI32_ALIGN4_EAGAIN           6
+#define CLOUDABI32_ALIGN4_EALREADY         7
+#define CLOUDABI32_ALIGN4_EBADF            8
+#define CLOUDABI32_ALIGN4_EBADMSG          9
+#define CLOUDABI32_ALIGN4_EBUSY           10
+#define CLOUDABI32_ALIGN4_ECANCELED       11
+#define CLOUDABI32_ALIGN4_ECHILD          12
+#define CLOUDABI32_ALIGN4_ECONNABORTED    13
+#define CLOUDABI32_ALIGN4_ECONNREFUSED    14
+#define CLOUDABI32_ALIGN4_ECONNRESET      15
+#define CLOUDABI32_ALIGN4_EDEADLK         16
+#define CLOUDABI32_ALIGN4_EDESTADDRREQ    17
+#define CLOUDABI32_ALIGN4_EDOM            18
+#define CLOUDABI32_ALIGN4_EDQUOT          19
+#define CLOUDABI32_ALIGN4_EEXIST          20
+#define CLOUDABI32_ALIGN4_EFAULT          21
+#define CLOUDABI32_ALIGN4_EFBIG           22
+#define CLOUDABI32_ALIGN4_EHOSTUNREACH    23
+#define CLOUDABI32_ALIGN4_EIDRM           24
+#define CLOUDABI32_ALIGN4_EILSEQ          25
+#define CLOUDABI32_ALIGN4_EINPROGRESS     26
+#define CLOUDABI32_ALIGN4_EINTR           27
+#define CLOUDABI32_ALIGN4_EINVAL          28
+#define CLOUDABI32_ALIGN4_EIO             29
+#define CLOUDABI32_ALIGN4_EISCONN         30
+#define CLOUDABI32_ALIGN4_EISDIR          31
+#define CLOUDABI32_ALIGN4_ELOOP           32
+#define CLOUDABI32_ALIGN4_EMFILE          33
+#define CLOUDABI32_ALIGN4_EMLINK          34
+#define CLOUDABI32_ALIGN4_EMSGSIZE        35
+#define CLOUDABI32_ALIGN4_EMULTIHOP       36
+#define CLOUDABI32_ALIGN4_ENAMETOOLONG    37
+#define CLOUDABI32_ALIGN4_ENETDOWN        38
+#define CLOUDABI32_ALIGN4_ENETRESET       39
+#define CLOUDABI32_ALIGN4_ENETUNREACH     40
+#define CLOUDABI32_ALIGN4_ENFILE          41
+#define CLOUDABI32_ALIGN4_ENOBUFS         42
+#define CLOUDABI32_ALIGN4_ENODEV          43
+#define CLOUDABI32_ALIGN4_ENOENT          44
+#define CLOUDABI32_ALIGN4_ENOEXEC         45
+#define CLOUDABI32_ALIGN4_ENOLCK          46
+#define CLOUDABI32_ALIGN4_ENOLINK         47
+#define CLOUDABI32_ALIGN4_ENOMEM          48
+#define CLOUDABI32_ALIGN4_ENOMSG          49
+#define CLOUDABI32_ALIGN4_ENOPROTOOPT     50
+#define CLOUDABI32_ALIGN4_ENOSPC          51
+#define CLOUDABI32_ALIGN4_ENOSYS          52
+#define CLOUDABI32_ALIGN4_ENOTCONN        53
+#define CLOUDABI32_ALIGN4_ENOTDIR         54
+#define CLOUDABI32_ALIGN4_ENOTEMPTY       55
+#define CLOUDABI32_ALIGN4_ENOTRECOVERABLE 56
+#define CLOUDABI32_ALIGN4_ENOTSOCK        57
+#define CLOUDABI32_ALIGN4_ENOTSUP         58
+#define CLOUDABI32_ALIGN4_ENOTTY          59
+#define CLOUDABI32_ALIGN4_ENXIO           60
+#define CLOUDABI32_ALIGN4_EOVERFLOW       61
+#define CLOUDABI32_ALIGN4_EOWNERDEAD      62
+#define CLOUDABI32_ALIGN4_EPERM           63
+#define CLOUDABI32_ALIGN4_EPIPE           64
+#define CLOUDABI32_ALIGN4_EPROTO          65
+#define CLOUDABI32_ALIGN4_EPROTONOSUPPORT 66
+#define CLOUDABI32_ALIGN4_EPROTOTYPE      67
+#define CLOUDABI32_ALIGN4_ERANGE          68
+#define CLOUDABI32_ALIGN4_EROFS           69
+#define CLOUDABI32_ALIGN4_ESPIPE          70
+#define CLOUDABI32_ALIGN4_ESRCH           71
+#define CLOUDABI32_ALIGN4_ESTALE          72
+#define CLOUDABI32_ALIGN4_ETIMEDOUT       73
+#define CLOUDABI32_ALIGN4_ETXTBSY         74
+#define CLOUDABI32_ALIGN4_EXDEV           75
+#define CLOUDABI32_ALIGN4_ENOTCAPABLE     76
+
+typedef uint16_t cloudabi32_align4_eventrwflags_t;
+#define CLOUDABI32_ALIGN4_EVENT_FD_READWRITE_HANGUP 0x0001
+
+typedef uint8_t cloudabi32_align4_eventtype_t;
+#define CLOUDABI32_ALIGN4_EVENTTYPE_CLOCK          1
+#define CLOUDABI32_ALIGN4_EVENTTYPE_CONDVAR        2
+#define CLOUDABI32_ALIGN4_EVENTTYPE_FD_READ        3
+#define CLOUDABI32_ALIGN4_EVENTTYPE_FD_WRITE       4
+#define CLOUDABI32_ALIGN4_EVENTTYPE_LOCK_RDLOCK    5
+#define CLOUDABI32_ALIGN4_EVENTTYPE_LOCK_WRLOCK    6
+#define CLOUDABI32_ALIGN4_EVENTTYPE_PROC_TERMINATE 7
+
+typedef uint32_t cloudabi32_align4_exitcode_t;
+
+typedef uint32_t cloudabi32_align4_fd_t;
+#define CLOUDABI32_ALIGN4_PROCESS_CHILD 0xffffffff
+#define CLOUDABI32_ALIGN4_MAP_ANON_FD   0xffffffff
+
+typedef uint16_t cloudabi32_align4_fdflags_t;
+#define CLOUDABI32_ALIGN4_FDFLAG_APPEND   0x0001
+#define CLOUDABI32_ALIGN4_FDFLAG_DSYNC    0x0002
+#define CLOUDABI32_ALIGN4_FDFLAG_NONBLOCK 0x0004
+#define CLOUDABI32_ALIGN4_FDFLAG_RSYNC    0x0008
+#define CLOUDABI32_ALIGN4_FDFLAG_SYNC     0x0010
+
+typedef uint16_t cloudabi32_align4_fdsflags_t;
+#define CLOUDABI32_ALIGN4_FDSTAT_FLAGS  0x0001
+#define CLOUDABI32_ALIGN4_FDSTAT_RIGHTS 0x0002
+
+typedef int64_t cloudabi32_align4_filedelta_t;
+
+typedef uint64_t cloudabi32_align4_filesize_t;
+
+typedef uint8_t cloudabi32_align4_filetype_t;
+#define CLOUDABI32_ALIGN4_FILETYPE_UNKNOWN            0
+#define CLOUDABI32_ALIGN4_FILETYPE_BLOCK_DEVICE      16
+#define CLOUDABI32_ALIGN4_FILETYPE_CHARACTER_DEVICE  17
+#define CLOUDABI32_ALIGN4_FILETYPE_DIRECTORY         32
+#define CLOUDABI32_ALIGN4_FILETYPE_PROCESS           80
+#define CLOUDABI32_ALIGN4_FILETYPE_REGULAR_FILE      96
+#define CLOUDABI32_ALIGN4_FILETYPE_SHARED_MEMORY    112
+#define CLOUDABI32_ALIGN4_FILETYPE_SOCKET_DGRAM     128
+#define CLOUDABI32_ALIGN4_FILETYPE_SOCKET_STREAM    130
+#define CLOUDABI32_ALIGN4_FILETYPE_SYMBOLIC_LINK    144
+
+typedef uint16_t cloudabi32_align4_fsflags_t;
+#define CLOUDABI32_ALIGN4_FILESTAT_ATIM     0x0001
+#define CLOUDABI32_ALIGN4_FILESTAT_ATIM_NOW 0x0002
+#define CLOUDABI32_ALIGN4_FILESTAT_MTIM     0x0004
+#define CLOUDABI32_ALIGN4_FILESTAT_MTIM_NOW 0x0008
+#define CLOUDABI32_ALIGN4_FILESTAT_SIZE     0x0010
+
+typedef uint64_t cloudabi32_align4_inode_t;
+
+typedef uint32_t cloudabi32_align4_linkcount_t;
+
+typedef uint32_t cloudabi32_align4_lock_t;
+#define CLOUDABI32_ALIGN4_LOCK_UNLOCKED       0x00000000
+#define CLOUDABI32_ALIGN4_LOCK_WRLOCKED       0x40000000
+#define CLOUDABI32_ALIGN4_LOCK_KERNEL_MANAGED 0x80000000
+#define CLOUDABI32_ALIGN4_LOCK_BOGUS          0x80000000
+
+typedef uint32_t cloudabi32_align4_lookupflags_t;
+#define CLOUDABI32_ALIGN4_LOOKUP_SYMLINK_FOLLOW 0x00000001
+
+typedef uint8_t cloudabi32_align4_mflags_t;
+#define CLOUDABI32_ALIGN4_MAP_ANON    0x01
+#define CLOUDABI32_ALIGN4_MAP_FIXED   0x02
+#define CLOUDABI32_ALIGN4_MAP_PRIVATE 0x04
+#define CLOUDABI32_ALIGN4_MAP_SHARED  0x08
+
+typedef uint8_t cloudabi32_align4_mprot_t;
+#define CLOUDABI32_ALIGN4_PROT_EXEC  0x01
+#define CLOUDABI32_ALIGN4_PROT_WRITE 0x02
+#define CLOUDABI32_ALIGN4_PROT_READ  0x04
+
+typedef uint8_t cloudabi32_align4_msflags_t;
+#define CLOUDABI32_ALIGN4_MS_ASYNC      0x01
+#define CLOUDABI32_ALIGN4_MS_INVALIDATE 0x02
+#define CLOUDABI32_ALIGN4_MS_SYNC       0x04
+
+typedef uint32_t cloudabi32_align4_nthreads_t;
+
+typedef uint16_t cloudabi32_align4_oflags_t;
+#define CLOUDABI32_ALIGN4_O_CREAT     0x0001
+#define CLOUDABI32_ALIGN4_O_DIRECTORY 0x0002
+#define CLOUDABI32_ALIGN4_O_EXCL      0x0004
+#define CLOUDABI32_ALIGN4_O_TRUNC     0x0008
+
+typedef uint16_t cloudabi32_align4_riflags_t;
+#define CLOUDABI32_ALIGN4_SOCK_RECV_PEEK    0x0004
+#define CLOUDABI32_ALIGN4_SOCK_RECV_WAITALL 0x0010
+
+typedef uint64_t cloudabi32_align4_rights_t;
+#define CLOUDABI32_ALIGN4_RIGHT_FD_DATASYNC           0x0000000000000001
+#define CLOUDABI32_ALIGN4_RIGHT_FD_READ               0x0000000000000002
+#define CLOUDABI32_ALIGN4_RIGHT_FD_SEEK               0x0000000000000004
+#define CLOUDABI32_ALIGN4_RIGHT_FD_STAT_PUT_FLAGS     0x0000000000000008
+#define CLOUDABI32_ALIGN4_RIGHT_FD_SYNC               0x0000000000000010
+#define CLOUDABI32_ALIGN4_RIGHT_FD_TELL               0x0000000000000020
+#define CLOUDABI32_ALIGN4_RIGHT_FD_WRITE              0x0000000000000040
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_ADVISE           0x0000000000000080
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_ALLOCATE         0x0000000000000100
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_CREATE_DIRECTORY 0x0000000000000200
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_CREATE_FILE      0x0000000000000400
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_LINK_SOURCE      0x0000000000001000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_LINK_TARGET      0x0000000000002000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_OPEN             0x0000000000004000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_READDIR          0x0000000000008000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_READLINK         0x0000000000010000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_RENAME_SOURCE    0x0000000000020000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_RENAME_TARGET    0x0000000000040000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_STAT_FGET        0x0000000000080000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_STAT_FPUT_SIZE   0x0000000000100000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_STAT_FPUT_TIMES  0x0000000000200000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_STAT_GET         0x0000000000400000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_STAT_PUT_TIMES   0x0000000000800000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_SYMLINK          0x0000000001000000
+#define CLOUDABI32_ALIGN4_RIGHT_FILE_UNLINK           0x0000000002000000
+#define CLOUDABI32_ALIGN4_RIGHT_MEM_MAP               0x0000000004000000
+#define CLOUDABI32_ALIGN4_RIGHT_MEM_MAP_EXEC          0x0000000008000000
+#define CLOUDABI32_ALIGN4_RIGHT_POLL_FD_READWRITE     0x0000000010000000
+#define CLOUDABI32_ALIGN4_RIGHT_POLL_PROC_TERMINATE   0x0000000040000000
+#define CLOUDABI32_ALIGN4_RIGHT_PROC_EXEC             0x0000000100000000
+#define CLOUDABI32_ALIGN4_RIGHT_SOCK_SHUTDOWN         0x0000008000000000
+
+typedef uint16_t cloudabi32_align4_roflags_t;
+#define CLOUDABI32_ALIGN4_SOCK_RECV_FDS_TRUNCATED  0x0001
+#define CLOUDABI32_ALIGN4_SOCK_RECV_DATA_TRUNCATED 0x0008
+
+typedef uint8_t cloudabi32_align4_scope_t;
+#define CLOUDABI32_ALIGN4_SCOPE_PRIVATE 4
+#define CLOUDABI32_ALIGN4_SCOPE_SHARED  8
+
+typedef uint8_t cloudabi32_align4_sdflags_t;
+#define CLOUDABI32_ALIGN4_SHUT_RD 0x01
+#define CLOUDABI32_ALIGN4_SHUT_WR 0x02
+
+typedef uint16_t cloudabi32_align4_siflags_t;
+
+typedef uint8_t cloudabi32_align4_signal_t;
+#define CLOUDABI32_ALIGN4_SIGABRT    1
+#define CLOUDABI32_ALIGN4_SIGALRM    2
+#define CLOUDABI32_ALIGN4_SIGBUS     3
+#define CLOUDABI32_ALIGN4_SIGCHLD    4
+#define CLOUDABI32_ALIGN4_SIGCONT    5
+#define CLOUDABI32_ALIGN4_SIGFPE     6
+#define CLOUDABI32_ALIGN4_SIGHUP     7
+#define CLOUDABI32_ALIGN4_SIGILL     8
+#define CLOUDABI32_ALIGN4_SIGINT     9
+#define CLOUDABI32_ALIGN4_SIGKILL   10
+#define CLOUDABI32_ALIGN4_SIGPIPE   11
+#define CLOUDABI32_ALIGN4_SIGQUIT   12
+#define CLOUDABI32_ALIGN4_SIGSEGV   13
+#define CLOUDABI32_ALIGN4_SIGSTOP   14
+#define CLOUDABI32_ALIGN4_SIGSYS    15
+#define CLOUDABI32_ALIGN4_SIGTERM   16
+#define CLOUDABI32_ALIGN4_SIGTRAP   17
+#define CLOUDABI32_ALIGN4_SIGTSTP   18
+#define CLOUDABI32_ALIGN4_SIGTTIN   19
+#define CLOUDABI32_ALIGN4_SIGTTOU   20
+#define CLOUDABI32_ALIGN4_SIGURG    21
+#define CLOUDABI32_ALIGN4_SIGUSR1   22
+#define CLOUDABI32_ALIGN4_SIGUSR2   23
+#define CLOUDABI32_ALIGN4_SIGVTALRM 24
+#define CLOUDABI32_ALIGN4_SIGXCPU   25
+#define CLOUDABI32_ALIGN4_SIGXFSZ   26
+
+typedef uint16_t cloudabi32_align4_subclockflags_t;
+#define CLOUDABI32_ALIGN4_SUBSCRIPTION_CLOCK_ABSTIME 0x0001
+
+typedef uint16_t cloudabi32_align4_subrwflags_t;
+#define CLOUDABI32_ALIGN4_SUBSCRIPTION_FD_READWRITE_POLL 0x0001
+
+typedef uint32_t cloudabi32_align4_tid_t;
+
+typedef uint64_t cloudabi32_align4_timestamp_t;
+
+typedef uint8_t cloudabi32_align4_ulflags_t;
+#define CLOUDABI32_ALIGN4_UNLINK_REMOVEDIR 0x01
+
+typedef uint64_t cloudabi32_align4_userdata_t;
+
+typedef uint8_t cloudabi32_align4_whence_t;
+#define CLOUDABI32_ALIGN4_WHENCE_CUR 1
+#define CLOUDABI32_ALIGN4_WHENCE_END 2
+#define CLOUDABI32_ALIGN4_WHENCE_SET 3
+
+typedef struct {
+  _Alignas(4) cloudabi32_align4_auxtype_t a_type;
+  union {
+    _Alignas(4) uint32_t a_val;
+    _Alignas(4) uint32_t a_ptr;
+  };
+} cloudabi32_align4_auxv_t;
+_Static_assert(offsetof(cloudabi32_align4_auxv_t, a_type) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_auxv_t, a_val) == 4, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_auxv_t, a_ptr) == 4, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_auxv_t) == 8, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_auxv_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(4) uint32_t buf;
+  _Alignas(4) uint32_t buf_len;
+} cloudabi32_align4_ciovec_t;
+_Static_assert(offsetof(cloudabi32_align4_ciovec_t, buf) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_ciovec_t, buf_len) == 4, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_ciovec_t) == 8, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_ciovec_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(4) cloudabi32_align4_dircookie_t d_next;
+  _Alignas(4) cloudabi32_align4_inode_t d_ino;
+  _Alignas(4) uint32_t d_namlen;
+  _Alignas(1) cloudabi32_align4_filetype_t d_type;
+} cloudabi32_align4_dirent_t;
+_Static_assert(offsetof(cloudabi32_align4_dirent_t, d_next) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_dirent_t, d_ino) == 8, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_dirent_t, d_namlen) == 16, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_dirent_t, d_type) == 20, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_dirent_t) == 24, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_dirent_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(4) cloudabi32_align4_userdata_t userdata;
+  _Alignas(2) cloudabi32_align4_errno_t error;
+  _Alignas(1) cloudabi32_align4_eventtype_t type;
+  union {
+    struct {
+      _Alignas(4) cloudabi32_align4_filesize_t nbytes;
+      _Alignas(1) char unused[4];
+      _Alignas(2) cloudabi32_align4_eventrwflags_t flags;
+    } fd_readwrite;
+    struct {
+      _Alignas(1) char unused[4];
+      _Alignas(1) cloudabi32_align4_signal_t signal;
+      _Alignas(4) cloudabi32_align4_exitcode_t exitcode;
+    } proc_terminate;
+  };
+} cloudabi32_align4_event_t;
+_Static_assert(offsetof(cloudabi32_align4_event_t, userdata) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_event_t, error) == 8, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_event_t, type) == 10, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_event_t, fd_readwrite.nbytes) == 12, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_event_t, fd_readwrite.unused) == 20, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_event_t, fd_readwrite.flags) == 24, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_event_t, proc_terminate.unused) == 12, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_event_t, proc_terminate.signal) == 16, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_event_t, proc_terminate.exitcode) == 20, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_event_t) == 28, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_event_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(1) cloudabi32_align4_filetype_t fs_filetype;
+  _Alignas(2) cloudabi32_align4_fdflags_t fs_flags;
+  _Alignas(4) cloudabi32_align4_rights_t fs_rights_base;
+  _Alignas(4) cloudabi32_align4_rights_t fs_rights_inheriting;
+} cloudabi32_align4_fdstat_t;
+_Static_assert(offsetof(cloudabi32_align4_fdstat_t, fs_filetype) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_fdstat_t, fs_flags) == 2, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_fdstat_t, fs_rights_base) == 4, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_fdstat_t, fs_rights_inheriting) == 12, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_fdstat_t) == 20, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_fdstat_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(4) cloudabi32_align4_device_t st_dev;
+  _Alignas(4) cloudabi32_align4_inode_t st_ino;
+  _Alignas(1) cloudabi32_align4_filetype_t st_filetype;
+  _Alignas(4) cloudabi32_align4_linkcount_t st_nlink;
+  _Alignas(4) cloudabi32_align4_filesize_t st_size;
+  _Alignas(4) cloudabi32_align4_timestamp_t st_atim;
+  _Alignas(4) cloudabi32_align4_timestamp_t st_mtim;
+  _Alignas(4) cloudabi32_align4_timestamp_t st_ctim;
+} cloudabi32_align4_filestat_t;
+_Static_assert(offsetof(cloudabi32_align4_filestat_t, st_dev) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_filestat_t, st_ino) == 8, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_filestat_t, st_filetype) == 16, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_filestat_t, st_nlink) == 20, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_filestat_t, st_size) == 24, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_filestat_t, st_atim) == 32, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_filestat_t, st_mtim) == 40, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_filestat_t, st_ctim) == 48, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_filestat_t) == 56, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_filestat_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(4) uint32_t buf;
+  _Alignas(4) uint32_t buf_len;
+} cloudabi32_align4_iovec_t;
+_Static_assert(offsetof(cloudabi32_align4_iovec_t, buf) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_iovec_t, buf_len) == 4, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_iovec_t) == 8, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_iovec_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(4) cloudabi32_align4_fd_t fd;
+  _Alignas(4) cloudabi32_align4_lookupflags_t flags;
+} cloudabi32_align4_lookup_t;
+_Static_assert(offsetof(cloudabi32_align4_lookup_t, fd) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_lookup_t, flags) == 4, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_lookup_t) == 8, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_lookup_t) == 4, "Incorrect layout");
+
+typedef void cloudabi32_align4_processentry_t(uint32_t auxv);
+
+typedef struct {
+  _Alignas(4) uint32_t ri_data;
+  _Alignas(4) uint32_t ri_data_len;
+  _Alignas(4) uint32_t ri_fds;
+  _Alignas(4) uint32_t ri_fds_len;
+  _Alignas(2) cloudabi32_align4_riflags_t ri_flags;
+} cloudabi32_align4_recv_in_t;
+_Static_assert(offsetof(cloudabi32_align4_recv_in_t, ri_data) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_recv_in_t, ri_data_len) == 4, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_recv_in_t, ri_fds) == 8, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_recv_in_t, ri_fds_len) == 12, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_recv_in_t, ri_flags) == 16, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_recv_in_t) == 20, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_recv_in_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(4) uint32_t ro_datalen;
+  _Alignas(4) uint32_t ro_fdslen;
+  _Alignas(1) char ro_unused[40];
+  _Alignas(2) cloudabi32_align4_roflags_t ro_flags;
+} cloudabi32_align4_recv_out_t;
+_Static_assert(offsetof(cloudabi32_align4_recv_out_t, ro_datalen) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_recv_out_t, ro_fdslen) == 4, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_recv_out_t, ro_unused) == 8, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_recv_out_t, ro_flags) == 48, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_recv_out_t) == 52, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_recv_out_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(4) uint32_t si_data;
+  _Alignas(4) uint32_t si_data_len;
+  _Alignas(4) uint32_t si_fds;
+  _Alignas(4) uint32_t si_fds_len;
+  _Alignas(2) cloudabi32_align4_siflags_t si_flags;
+} cloudabi32_align4_send_in_t;
+_Static_assert(offsetof(cloudabi32_align4_send_in_t, si_data) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_send_in_t, si_data_len) == 4, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_send_in_t, si_fds) == 8, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_send_in_t, si_fds_len) == 12, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_send_in_t, si_flags) == 16, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_send_in_t) == 20, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_send_in_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(4) uint32_t so_datalen;
+} cloudabi32_align4_send_out_t;
+_Static_assert(offsetof(cloudabi32_align4_send_out_t, so_datalen) == 0, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_send_out_t) == 4, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_send_out_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(4) cloudabi32_align4_userdata_t userdata;
+  _Alignas(2) uint16_t unused;
+  _Alignas(1) cloudabi32_align4_eventtype_t type;
+  union {
+    struct {
+      _Alignas(4) cloudabi32_align4_userdata_t identifier;
+      _Alignas(4) cloudabi32_align4_clockid_t clock_id;
+      _Alignas(4) cloudabi32_align4_timestamp_t timeout;
+      _Alignas(4) cloudabi32_align4_timestamp_t precision;
+      _Alignas(2) cloudabi32_align4_subclockflags_t flags;
+    } clock;
+    struct {
+      _Alignas(4) uint32_t condvar;
+      _Alignas(4) uint32_t lock;
+      _Alignas(1) cloudabi32_align4_scope_t condvar_scope;
+      _Alignas(1) cloudabi32_align4_scope_t lock_scope;
+    } condvar;
+    struct {
+      _Alignas(4) cloudabi32_align4_fd_t fd;
+      _Alignas(2) cloudabi32_align4_subrwflags_t flags;
+    } fd_readwrite;
+    struct {
+      _Alignas(4) uint32_t lock;
+      _Alignas(1) cloudabi32_align4_scope_t lock_scope;
+    } lock;
+    struct {
+      _Alignas(4) cloudabi32_align4_fd_t fd;
+    } proc_terminate;
+  };
+} cloudabi32_align4_subscription_t;
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, userdata) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, unused) == 8, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, type) == 10, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, clock.identifier) == 12, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, clock.clock_id) == 20, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, clock.timeout) == 24, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, clock.precision) == 32, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, clock.flags) == 40, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, condvar.condvar) == 12, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, condvar.lock) == 16, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, condvar.condvar_scope) == 20, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, condvar.lock_scope) == 21, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, fd_readwrite.fd) == 12, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, fd_readwrite.flags) == 16, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, lock.lock) == 12, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, lock.lock_scope) == 16, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_subscription_t, proc_terminate.fd) == 12, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_subscription_t) == 44, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_subscription_t) == 4, "Incorrect layout");
+
+typedef struct {
+  _Alignas(4) uint32_t parent;
+} cloudabi32_align4_tcb_t;
+_Static_assert(offsetof(cloudabi32_align4_tcb_t, parent) == 0, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_tcb_t) == 4, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_tcb_t) == 4, "Incorrect layout");
+
+typedef void cloudabi32_align4_threadentry_t(cloudabi32_align4_tid_t tid, uint32_t aux);
+
+typedef struct {
+  _Alignas(4) uint32_t entry_point;
+  _Alignas(4) uint32_t stack;
+  _Alignas(4) uint32_t stack_len;
+  _Alignas(4) uint32_t argument;
+} cloudabi32_align4_threadattr_t;
+_Static_assert(offsetof(cloudabi32_align4_threadattr_t, entry_point) == 0, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_threadattr_t, stack) == 4, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_threadattr_t, stack_len) == 8, "Incorrect layout");
+_Static_assert(offsetof(cloudabi32_align4_threadattr_t, argument) == 12, "Incorrect layout");
+_Static_assert(sizeof(cloudabi32_align4_threadattr_t) == 16, "Incorrect layout");
+_Static_assert(_Alignof(cloudabi32_align4_threadattr_t) == 4, "Incorrect layout");
+
+#ifdef __cplusplus
+}  // extern "C"
+#endif
+
+#endif